@@ -0,0 +1,61 @@
+# Controller modules frozen into the firmware image, shared by manifest.py
+# (ESP32-S2 board) and manifest_unix.py (unix port, for boot comparisons).
+# Exactly the modules listed below are frozen, plus the files named in the two
+# package() calls; nothing else from this repo.
+#
+# config.py, config_mini_kiln.py, main.py and boot.py are left out on purpose:
+# they stay on the filesystem so the kiln can be reconfigured without a rebuild.
+# Relative paths are resolved from this file's directory.
+#
+# Import order, which this relies on (assumed from the MicroPython v1.25 docs
+# and port manifests, not yet checked on the board):
+#
+# - sys.path is ['', '.frozen', '/lib'] by default, so a file of the same name in
+#   the current directory still wins over the frozen copy. Remove the .py files
+#   listed here from the board after flashing, or the frozen ones are never used.
+# - time.py extends the built-in time module (it does `from utime import *`).
+#   time is one of the extensible built-ins, so `import time` looks along sys.path
+#   first and finds this copy; `utime` still names the built-in.
+# - logging.py, datetime.py and the aiohttp package are this repo's own versions.
+#   The esp32 board manifest (asyncio, bundle-networking: mip, ntptime, requests,
+#   webrepl; dht, ds18x20, neopixel, onewire, umqtt, upysh) and the unix standard
+#   variant (asyncio, mip-cmdline) freeze none of these names, so nothing is
+#   frozen twice. After a build, check with help('modules') that logging,
+#   datetime and aiohttp appear once and that `import time; time.__file__`
+#   is '.frozen/time.py'.
+
+CONTROLLER = "../microdot_controller"
+
+for name in (
+    "backlog",
+    "boot_profile",
+    "broadcaster",
+    "buffered_log",
+    "datetime",
+    "device_status",
+    "influxdb",
+    "instrumentation",
+    "logging",
+    "max31855",
+    "max31855_reader",
+    "offline_buffer",
+    "oven",
+    "ovenWatcher",
+    "pid_config",
+    "profile_index",
+    "ring_buffer",
+    "scheduler",
+    "singleton",
+    "static_files",
+    "status_codec",
+    "time",
+    "time_keeper",
+    "timezone",
+    "type_k",
+    "web",
+    "wifi_utils",
+):
+    module(name + ".py", base_path=CONTROLLER)
+
+package("microdot", files=("__init__.py", "helpers.py", "microdot.py", "websocket.py"), base_path=CONTROLLER)
+package("aiohttp", files=("__init__.py", "aiohttp_ws.py"), base_path=CONTROLLER)
@@ -0,0 +1,16 @@
+# Frozen-bytecode firmware for the ESP32-S2 controller: the stock board
+# manifest plus the controller modules (controller_manifest.py).
+#
+# Built from a MicroPython v1.25.0 checkout, with ESP-IDF set up as the
+# MicroPython esp32 port README describes:
+#
+#     make -C mpy-cross
+#     make -C ports/esp32 BOARD=ESP32_GENERIC_S2 FROZEN_MANIFEST=<this repo>/firmware/manifest.py
+#
+# and flashed like the stock image (burn_firmware.bat), using
+# ports/esp32/build-ESP32_GENERIC_S2/firmware.bin. Then run the controller
+# with microdot_controller/run_frozen.bat, which puts the frozen modules ahead
+# of the mounted sources.
+
+include("$(PORT_DIR)/boards/manifest.py")
+include("controller_manifest.py")
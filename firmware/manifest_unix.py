@@ -0,0 +1,12 @@
+# Unix port image with the controller modules frozen, used by
+# tools/compare_frozen_boot.py to measure boot time and free heap against
+# running from sources. From a MicroPython v1.25.0 checkout:
+#
+#     make -C mpy-cross
+#     make -C ports/unix submodules
+#     make -C ports/unix FROZEN_MANIFEST=<this repo>/firmware/manifest_unix.py BUILD=build-frozen PROG=micropython-frozen
+#
+# The stock binary for the comparison is the plain `make -C ports/unix` build.
+
+include("$(PORT_DIR)/variants/standard/manifest.py")
+include("controller_manifest.py")
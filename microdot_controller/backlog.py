@@ -0,0 +1,131 @@
+from array import array
+
+DEFAULT_CAPACITY = 240  # Points kept for the graph of a firing, whatever its length
+
+FIELDS = ("runtime", "temperature", "target", "heat")
+
+
+class Backlog:
+    """
+    Fixed-capacity, columnar history of a firing for the status graph.
+
+    Points are stored in parallel float arrays. When the arrays are full the history
+    is downsampled in place to half its size with largest-triangle-three-buckets
+    (on temperature over runtime), and from then on only every `stride`-th appended
+    point is kept so that old and new parts of the graph keep the same density.
+    Memory use and the backlog payload size are therefore bounded by the capacity.
+
+    The last slot always holds the newest point, so the right edge of the graph is
+    current: points between two kept ones overwrite that slot (it is "provisional")
+    until the next kept point takes it over for good.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 8:
+            raise ValueError("Backlog capacity must be at least 8")
+        self.capacity = capacity
+        self.runtime = array('f', [0] * capacity)
+        self.temperature = array('f', [0] * capacity)
+        self.target = array('f', [0] * capacity)
+        self.heat = array('f', [0] * capacity)
+        self.generation = 0  # Changes whenever stored points move, see points()
+        self.clear()
+
+    def clear(self):
+        self.generation += 1
+        self.count = 0
+        self.stride = 1
+        self._skipped = 0
+        self._tail_provisional = False  # Last slot holds a point off the stride grid
+
+    def __len__(self):
+        return self.count
+
+    def append(self, runtime, temperature, target, heat):
+        keep = self._skipped == 0
+        if self._tail_provisional:
+            i = self.count - 1
+        elif self.count == self.capacity:
+            self._downsample(self.capacity // 2)
+            self.stride *= 2
+            # The newest point survived the downsampling as the last one; this point
+            # replaces it and restarts the stride, so the last two stored points are
+            # not a single tick apart
+            i = self.count - 1
+            keep = True
+            self._skipped = 0
+        else:
+            i = self.count
+            self.count += 1
+        self._skipped = (self._skipped + 1) % self.stride
+        self._tail_provisional = not keep
+        self.runtime[i] = runtime
+        self.temperature[i] = temperature
+        self.target[i] = target
+        self.heat[i] = heat
+
+    def point(self, i) -> dict:
+        return {
+            "runtime": self.runtime[i],
+            "temperature": self.temperature[i],
+            "target": self.target[i],
+            "heat": self.heat[i],
+        }
+
+    def points(self, start=0, stop=None):
+        """
+        Yields the stored points from start to stop, oldest first, as state-like dicts.
+        Readers that yield to the event loop between points should check that
+        `generation` did not change, as clear() and downsampling move the points.
+        """
+        for i in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.point(i)
+
+    def _move(self, src, dst):
+        self.runtime[dst] = self.runtime[src]
+        self.temperature[dst] = self.temperature[src]
+        self.target[dst] = self.target[src]
+        self.heat[dst] = self.heat[src]
+
+    def _downsample(self, threshold):
+        """
+        Largest-triangle-three-buckets down to `threshold` points, in place. The first
+        and last points are kept; every other output point is the one of its bucket
+        forming the largest triangle with the previously kept point and the average
+        of the next bucket. Output indexes never overtake the bucket being read, so
+        the columns can be overwritten as we go.
+        """
+        n = self.count
+        x = self.runtime
+        y = self.temperature
+        every = (n - 2) / (threshold - 2)
+        a = 0  # Index of the last kept point, in the original numbering
+        ax = x[0]
+        ay = y[0]
+        for k in range(threshold - 2):
+            start = int(k * every) + 1
+            end = int((k + 1) * every) + 1
+            next_start = end
+            next_end = min(int((k + 2) * every) + 1, n)
+            avg_x = 0.0
+            avg_y = 0.0
+            for j in range(next_start, next_end):
+                avg_x += x[j]
+                avg_y += y[j]
+            length = next_end - next_start
+            avg_x /= length
+            avg_y /= length
+            best = start
+            best_area = -1.0
+            for j in range(start, end):
+                area = abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay))
+                if area > best_area:
+                    best_area = area
+                    best = j
+            a = best
+            ax = x[a]
+            ay = y[a]
+            self._move(a, k + 1)
+        self._move(n - 1, threshold - 1)
+        self.count = threshold
+        self.generation += 1
@@ -0,0 +1,45 @@
+# Pushes points through the batched InfluxDB writer against the host stub
+# (benchmarks/influxdb_stub.py) and prints the writer counters.
+#
+#     python benchmarks/influxdb_stub.py --port 8086 --latency 0.5
+#     mpr -d c9 -m . run benchmarks/bench_influxdb.py
+#
+# Set STUB_URL to the address of the host running the stub.
+import asyncio
+import config
+from influxdb import InfluxDB
+from wifi_utils import connect_to_wifi
+from benchmarks.bench_utils import report
+
+STUB_URL = "http://192.168.0.3:8086"
+POINTS = 300
+POINTS_PER_SECOND = 20
+
+
+async def produce(influxdb):
+    for i in range(POINTS):
+        influxdb.fire_write({"temperature": 20.0 + i, "heat": 0.5}, {"stage": "bench"})
+        await asyncio.sleep(1 / POINTS_PER_SECOND)
+    # Give the writer time to drain the queue
+    await asyncio.sleep(2 * config.influxdb_flush_interval)
+
+
+def run():
+    connect_to_wifi()
+    influxdb = InfluxDB()
+    influxdb.config(
+        base_url=STUB_URL,
+        api_token="bench",
+        organization="bench",
+        bucket="bench",
+        instance_name="bench",
+        buffer_size=config.influxdb_buffer_size,
+        batch_size=config.influxdb_batch_size,
+        flush_interval=config.influxdb_flush_interval,
+    )
+    asyncio.run(produce(influxdb))
+    for name, value in influxdb.get_stats().items():
+        report(name, value, "")
+
+
+run()
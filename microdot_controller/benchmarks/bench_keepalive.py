@@ -0,0 +1,102 @@
+# Measures requests per second against the web server with a new connection
+# per request versus one persistent HTTP/1.1 connection. Runs on the host
+# (CPython), against the board:
+#
+#     python benchmarks/bench_keepalive.py --url http://192.168.0.20/profiles
+#
+# or against the vendored Microdot served locally, to check the keep-alive
+# logic without hardware:
+#
+#     python benchmarks/bench_keepalive.py --local
+import argparse
+import asyncio
+import http.client
+import importlib.util
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+LOCAL_PORT = 5081
+
+
+def load_microdot():
+    # The controller directory shadows the stdlib logging module, so the
+    # vendored package is loaded on its own instead of via sys.path.
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "microdot")
+    spec = importlib.util.spec_from_file_location(
+        "microdot", os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["microdot"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def serve_locally():
+    microdot = load_microdot()
+    app = microdot.Microdot()
+
+    @app.route("/profiles")
+    async def profiles(request):
+        return '[{"name": "bench", "data": [[0, 20], [3600, 1000]]}]', 200, \
+            {"Content-Type": "application/json"}
+
+    thread = threading.Thread(
+        target=lambda: asyncio.run(app.start_server(host="127.0.0.1", port=LOCAL_PORT)),
+        daemon=True)
+    thread.start()
+    time.sleep(0.5)
+    return "http://127.0.0.1:%d/profiles" % LOCAL_PORT
+
+
+def new_connection_per_request(host, port, path, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        connection.request("GET", path, headers={"Connection": "close"})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+    return count / (time.perf_counter() - start)
+
+
+def persistent_connection(host, port, path, count):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    reconnects = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            # server reached keep_alive_max_requests
+            connection.close()
+            reconnects += 1
+    rate = count / (time.perf_counter() - start)
+    connection.close()
+    return rate, reconnects
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep-alive throughput benchmark")
+    parser.add_argument("--url", help="URL of a GET endpoint on the board")
+    parser.add_argument("--local", action="store_true", help="serve the vendored Microdot on localhost")
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    url = serve_locally() if args.local else args.url
+    if url is None:
+        parser.error("either --url or --local is required")
+    parts = urlsplit(url)
+    path = parts.path or "/"
+
+    closed = new_connection_per_request(parts.hostname, parts.port or 80, path, args.requests)
+    persistent, reconnects = persistent_connection(parts.hostname, parts.port or 80, path, args.requests)
+    print("%-40s %12.4g %s" % ("new connection per request", closed, "req/s"))
+    print("%-40s %12.4g %s" % ("persistent connection", persistent, "req/s"))
+    print("%-40s %12d" % ("reconnects (max requests reached)", reconnects))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Cost of the log calls made by one Oven.run tick, with the logger at INFO
+# (debug records discarded) and at DEBUG, and with the eager "%" formatting
+# the controller used before. Needs MicroPython (the local logging module uses
+# micropython.const); the unix port works as well as the board:
+#
+#     mpr -d c9 -m . run benchmarks/bench_logging.py
+import logging
+from benchmarks.bench_utils import allocations, timeit, report
+
+
+class NullStream:
+    def write(self, s):
+        pass
+
+
+class Profile:
+    """Stands in for oven.Profile, whose str() dumps every point."""
+
+    def __init__(self):
+        self.data = [[i * 60, 20 + i * 5] for i in range(40)]
+
+    def __str__(self):
+        return "Profile(%s)" % self.data
+
+
+log = logging.getLogger("bench_logging")
+handler = logging.StreamHandler(NullStream())
+handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+log.addHandler(handler)
+
+profile = Profile()
+temperature, target, heat, runtime, totaltime, pid_value = 812.5, 815.0, 0.42, 1234.5, 7200, 0.418
+
+
+def tick_lazy(i):
+    log.info("running at %.1f deg C (Target: %.1f), heat %.2f, cool %.2f, air %.2f (%.1fs/%.0f)",
+             temperature, target, heat, 0, 0, runtime, totaltime)
+    log.debug(" >>> Profile <<<  %s", profile)
+    log.debug(" >>> Runtime <<<  %s", runtime)
+    log.info("pid: %.3f", pid_value)
+    log.debug("+++ Debug_times +++ runtime: %s, totaltime: %s", runtime, totaltime)
+    log.info("Setting heat duty to %.2f", heat)
+
+
+def tick_eager(i):
+    log.info("running at %.1f deg C (Target: %.1f), heat %.2f, cool %.2f, air %.2f (%.1fs/%.0f)" %
+             (temperature, target, heat, 0, 0, runtime, totaltime))
+    log.debug(f" >>> Profile <<<  {profile}")
+    log.debug(f" >>> Runtime <<<  {runtime}")
+    log.info("pid: %.3f" % pid_value)
+    log.debug(f"+++ Debug_times +++ runtime: {runtime}, totaltime: {totaltime}")
+    log.info("Setting heat duty to %.2f" % heat)
+
+
+def tick_disabled(i):
+    log.debug(" >>> Profile <<<  %s", profile)
+
+
+for level_name, level in (("INFO", logging.INFO), ("DEBUG", logging.DEBUG), ("WARNING", logging.WARNING)):
+    log.setLevel(level)
+    handler.setLevel(level)
+    for name, fn in (("lazy", tick_lazy), ("eager", tick_eager)):
+        report("tick at %s, %s" % (level_name, name), timeit(fn, 200), "us")
+        report("tick at %s, %s" % (level_name, name), allocations(fn, 50), "bytes")
+
+log.setLevel(logging.INFO)
+report("discarded debug call", timeit(tick_disabled, 2000), "us")
+report("discarded debug call", allocations(tick_disabled, 200), "bytes")
@@ -0,0 +1,64 @@
+# Checks the MAX31855 frame decoder against the datasheet examples and measures
+# the read path over a mock SPI bus. Hardware free, runs on the board, the unix
+# port or CPython (allocation counts need MicroPython):
+#
+#     mpr -d c9 -m . run benchmarks/bench_max31855_reader.py
+#     PYTHONPATH=. python benchmarks/bench_max31855_reader.py
+from max31855_reader import Max31855Reader, Max31855Reading, FAULT_OPEN_CIRCUIT
+from benchmarks.bench_utils import allocations, timeit, report
+
+
+def frame(thermocouple, junction, fault=False, faults=0):
+    """Builds the 4 byte frame the MAX31855 sends for the given temperatures."""
+    high = ((int(thermocouple * 4) & 0x3FFF) << 2) | (1 if fault else 0)
+    low = ((int(junction * 16) & 0xFFF) << 4) | faults
+    return bytes((high >> 8, high & 0xFF, low >> 8, low & 0xFF))
+
+
+class MockSPI:
+    """Replays the given frames, in a loop, through readinto()."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    def readinto(self, buf):
+        data = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        for i in range(4):
+            buf[i] = data[i]
+
+
+class MockPin:
+    def on(self):
+        pass
+
+    def off(self):
+        pass
+
+
+# (thermocouple degC, cold junction degC) pairs from the datasheet tables 2 and 4
+DATASHEET = ((1600.0, 127.0), (1000.0, 100.5625), (100.75, 25.0), (25.0, 0.0625), (0.0, 0.0),
+             (-0.25, -0.0625), (-1.0, -1.0), (-250.0, -20.0), (1.5, -55.0))
+
+
+def run():
+    reading = Max31855Reading()
+    frames = [frame(tc, cj) for tc, cj in DATASHEET]
+    reader = Max31855Reader(MockSPI(frames), MockPin())
+    for tc, cj in DATASHEET:
+        reader.read_into(reading)
+        assert reading.raw_temperature == tc, (reading.raw_temperature, tc)
+        assert reading.junction_temperature == cj, (reading.junction_temperature, cj)
+        assert not reading.fault
+    reader = Max31855Reader(MockSPI([frame(0, 25.0, True, FAULT_OPEN_CIRCUIT)]), MockPin())
+    reader.read_into(reading)
+    assert reading.fault and reading.faults == FAULT_OPEN_CIRCUIT
+    print("decoder matches the datasheet examples")
+
+    reader = Max31855Reader(MockSPI(frames), MockPin())
+    report("read_into", timeit(lambda i: reader.read_into(reading), 2000), "us/read")
+    report("read_into, heap", allocations(lambda i: reader.read_into(reading), 200), "bytes/read")
+
+
+run()
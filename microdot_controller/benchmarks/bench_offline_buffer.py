@@ -0,0 +1,65 @@
+# Simulates a Wi-Fi outage during a firing: points are produced at a steady
+# rate while the InfluxDB stub is taken down and brought back up, then the
+# writer and stub counters are compared. Runs on the MicroPython unix port
+# with a scratch directory standing in for the flash filesystem:
+#
+#     python benchmarks/influxdb_stub.py --port 8086 &
+#     MICROPYPATH=.:~/.micropython/lib micropython benchmarks/bench_offline_buffer.py
+import asyncio
+import aiohttp
+from influxdb import InfluxDB
+from offline_buffer import OfflineBuffer
+from benchmarks.bench_utils import report
+
+STUB_URL = "http://127.0.0.1:8086"
+SPOOL_DIR = "/tmp/influxdb_offline"
+SECONDS_UP, SECONDS_DOWN = 10, 30
+POINTS_PER_SECOND = 5
+
+
+async def set_stub(path):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(STUB_URL + path) as response:
+            return await response.text()
+
+
+async def produce(influxdb, seconds):
+    for i in range(seconds * POINTS_PER_SECOND):
+        influxdb.fire_write({"temperature": 20.0 + i, "heat": 0.5}, {"stage": "bench"})
+        await asyncio.sleep(1 / POINTS_PER_SECOND)
+
+
+async def scenario(influxdb):
+    await set_stub("/up")
+    await produce(influxdb, SECONDS_UP)
+    await set_stub("/down")
+    await produce(influxdb, SECONDS_DOWN)
+    await set_stub("/up")
+    await produce(influxdb, SECONDS_UP)
+    while influxdb.offline_buffer.pending:
+        await asyncio.sleep(1)
+    await asyncio.sleep(2 * influxdb.flush_interval)
+    print("stub:", await set_stub("/stats"))
+
+
+def run():
+    influxdb = InfluxDB()
+    influxdb.config(
+        base_url=STUB_URL,
+        api_token="bench",
+        organization="bench",
+        bucket="bench",
+        instance_name="bench",
+        flush_interval=2,
+        offline_buffer=OfflineBuffer(
+            SPOOL_DIR,
+            disk_status=lambda: {"diskUsed": 0, "diskTotal": 1024},
+        ),
+    )
+    asyncio.run(scenario(influxdb))
+    report("points produced", (2 * SECONDS_UP + SECONDS_DOWN) * POINTS_PER_SECOND, "")
+    for name, value in influxdb.get_stats().items():
+        report(name, value, "")
+
+
+run()
@@ -0,0 +1,53 @@
+# Per-call cost and heap allocation of PID.compute, against the datetime based
+# implementation it replaced. Allocation counts need MicroPython (gc.mem_alloc);
+# the unix port works as well as the board:
+#
+#     mpr -d c9 -m . run benchmarks/bench_pid.py
+#
+# On ports where floats are boxed (ESP32 uses object representation A), the
+# arithmetic itself still allocates a few bytes per float result; what this
+# benchmark isolates is the list, datetime and PIDState churn.
+import datetime
+from oven import PID, PIDState
+from timezone import BRT_TZ
+from benchmarks.bench_utils import allocations, timeit, report
+
+
+class LegacyPID(PID):
+    """PID.compute as it was before the reduced-allocation fast path."""
+
+    def __init__(self, ki=1, kp=1, kd=1):
+        super().__init__(ki=ki, kp=kp, kd=kd)
+        self.lastNow = datetime.datetime.now(BRT_TZ)
+
+    def compute(self, setpoint, ispoint):
+        now = datetime.datetime.now(BRT_TZ)
+        timeDelta = (now - self.lastNow).total_seconds() or 0.001
+        error = float(setpoint - ispoint)
+        self.iterm += (error * timeDelta * self.ki)
+        self.iterm = sorted([-1, self.iterm, 1])[1]
+        self._iErr += error * timeDelta
+        dErr = (error - self.lastErr) / timeDelta
+        pTerm = self.kp * error
+        dTerm = self.kd * dErr
+        output = pTerm + self.iterm + dTerm
+        output = sorted([-1, output, 1])[1]
+        self.lastErr = error
+        self.lastNow = now
+        self.state = PIDState(
+            kp=self.kp, kd=self.kd, ki=self.ki, err=error, dErr=dErr, iErr=self._iErr,
+            pTerm=pTerm, dTerm=dTerm, iTerm=self.iterm,
+            raw_out=self.kp * error + self._iErr * self.ki + self.kd * dErr,
+            bounded_out=output
+        )
+        return output
+
+
+def run(iterations=500):
+    for name, pid in (("legacy", LegacyPID(ki=0.01, kd=5, kp=0.2)), ("fast path", PID(ki=0.01, kd=5, kp=0.2))):
+        pid.compute(100, 90)  # warm up: the state record is allocated on the first call
+        report(name + ", time", timeit(lambda i: pid.compute(100, 90 + (i & 7)), iterations), "us/call")
+        report(name + ", heap", allocations(lambda i: pid.compute(100, 90 + (i & 7)), iterations), "bytes/call")
+
+
+run()
@@ -0,0 +1,69 @@
+# Compares the linear-scan Profile lookup with the indexed one in oven.Profile.
+#
+#     mpr -d c9 -m . run benchmarks/bench_profile.py
+import json
+import random
+from oven import Profile
+from benchmarks.bench_utils import timeit, report
+
+
+class LegacyProfile:
+    """Profile lookup as it was before the segment index was added."""
+
+    def __init__(self, json_data):
+        obj = json.loads(json_data)
+        self.name = obj["name"]
+        self.data = sorted(obj["data"])
+
+    def get_duration(self):
+        return max([t for (t, x) in self.data])
+
+    def get_surrounding_points(self, time_val):
+        if time_val > self.get_duration():
+            return (None, None)
+        prev_point = None
+        next_point = None
+        for i in range(len(self.data)):
+            if time_val < self.data[i][0]:
+                prev_point = self.data[i-1]
+                next_point = self.data[i]
+                break
+        return (prev_point, next_point)
+
+    def get_target_temperature(self, time_val):
+        if time_val > self.get_duration():
+            return 0
+        (prev_point, next_point) = self.get_surrounding_points(time_val)
+        if (prev_point is None) and (next_point is None):
+            return 0
+        incl = float(next_point[1] - prev_point[1]) / float(next_point[0] - prev_point[0])
+        return prev_point[1] + (time_val - prev_point[0]) * incl
+
+
+def make_profile_json(points):
+    data = [[i * 60, random.randint(20, 1300)] for i in range(points)]
+    return json.dumps({"name": "bench_%d" % points, "data": data})
+
+
+def run(iterations=1000):
+    for points in (10, 100, 1000):
+        profile_json = make_profile_json(points)
+        legacy = LegacyProfile(profile_json)
+        indexed = Profile(profile_json)
+        duration = indexed.get_duration()
+        step = duration / iterations
+
+        # Same answers over the whole profile
+        for i in range(iterations):
+            t = i * step
+            assert legacy.get_target_temperature(t) == indexed.get_target_temperature(t)
+
+        print("--- %d points ---" % points)
+        report("legacy, monotonic runtime", timeit(lambda i: legacy.get_target_temperature(i * step), iterations), "us/call")
+        report("indexed, monotonic runtime", timeit(lambda i: indexed.get_target_temperature(i * step), iterations), "us/call")
+        times = [random.random() * duration for _ in range(iterations)]
+        report("legacy, random lookups", timeit(lambda i: legacy.get_target_temperature(times[i]), iterations), "us/call")
+        report("indexed, random lookups", timeit(lambda i: indexed.get_target_temperature(times[i]), iterations), "us/call")
+
+
+run()
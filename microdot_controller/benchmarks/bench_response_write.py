@@ -0,0 +1,119 @@
+# Compares the buffered Response.write with the previous serializer, which
+# issued one stream write for the status line and one per header. Runs on the
+# host (CPython) against the vendored Microdot:
+#
+#     python benchmarks/bench_response_write.py
+#
+# Reports the stream writes (one socket send each) per response, and the mean
+# latency of a request over a persistent loopback connection.
+import asyncio
+import http.client
+import threading
+import time
+
+from bench_keepalive import load_microdot
+
+microdot = load_microdot()
+Response = microdot.Response
+MUTED_SOCKET_ERRORS = microdot.microdot.MUTED_SOCKET_ERRORS
+
+PORT = 5082
+REQUESTS = 300
+BODIES = {
+    "status (small json)": b'{"state": "RUNNING", "temperature": 812.5, "target": 815.0}',
+    "profile list (4 KB)": b"x" * 4096,
+}
+
+
+class LegacyResponse(Response):
+    async def write(self, stream):
+        self.complete()
+        try:
+            reason = self.reason if self.reason is not None else \
+                ('OK' if self.status_code == 200 else 'N/A')
+            await stream.awrite('HTTP/{version} {status_code} {reason}\r\n'.format(
+                version=self.http_version, status_code=self.status_code,
+                reason=reason).encode())
+            for header, value in self.headers.items():
+                values = value if isinstance(value, list) else [value]
+                for value in values:
+                    await stream.awrite('{header}: {value}\r\n'.format(
+                        header=header, value=value).encode())
+            await stream.awrite(b'\r\n')
+            if not self.is_head:
+                iter = self.body_iter()
+                async for body in iter:
+                    if isinstance(body, str):
+                        body = body.encode()
+                    await stream.awrite(body)
+                if hasattr(iter, 'aclose'):
+                    await iter.aclose()
+        except OSError as exc:
+            if exc.errno not in MUTED_SOCKET_ERRORS:
+                raise
+
+
+class CountingStream:
+    def __init__(self):
+        self.writes = 0
+        self.size = 0
+
+    async def awrite(self, data):
+        self.writes += 1
+        self.size += len(data)
+
+
+def headers():
+    return {"Content-Type": "application/json", "Cache-Control": "no-cache", "ETag": '"1a2b3c"'}
+
+
+def count_writes(response_class, body):
+    stream = CountingStream()
+    asyncio.run(response_class(body, headers=headers()).write(stream))
+    return stream.writes, stream.size
+
+
+def serve(app):
+    thread = threading.Thread(
+        target=lambda: asyncio.run(app.start_server(host="127.0.0.1", port=PORT)), daemon=True)
+    thread.start()
+    time.sleep(0.5)
+
+
+def mean_latency_ms(path):
+    connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=10)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            connection.close()
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return elapsed * 1000 / REQUESTS
+
+
+def main():
+    for name, body in BODIES.items():
+        for label, response_class in (("legacy", LegacyResponse), ("buffered", Response)):
+            writes, size = count_writes(response_class, body)
+            print("%-40s %12d writes %8d bytes" % ("%s, %s" % (name, label), writes, size))
+
+    app = microdot.Microdot()
+    app.keep_alive_max_requests = REQUESTS + 1
+
+    @app.route("/<kind>/<name>")
+    async def respond(request, kind, name):
+        response_class = LegacyResponse if kind == "legacy" else Response
+        return response_class(BODIES[name.replace("_", " ")], headers=headers())
+
+    serve(app)
+    for name in BODIES:
+        for label in ("legacy", "buffered"):
+            latency = mean_latency_ms("/%s/%s" % (label, name.replace(" ", "_")))
+            print("%-40s %12.4g %s" % ("%s, %s" % (name, label), latency, "ms/request"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Per-tick cost of computing the profile runtime: the datetime/BRT_TZ
+# arithmetic Oven.run used before, against the ticks_ms difference it uses now,
+# plus the start_time tag OvenWatcher formatted every tick. Needs MicroPython
+# (time.ticks_ms); the unix port works as well as the board:
+#
+#     mpr -d c9 -m . run benchmarks/bench_runtime.py
+import time
+import datetime
+from timezone import BRT_TZ
+from benchmarks.bench_utils import allocations, timeit, report
+
+start_time = datetime.datetime.now(BRT_TZ)
+start_ticks = time.ticks_ms()
+start_time_iso = start_time.isoformat()
+
+
+def runtime_datetime(i):
+    return (datetime.datetime.now(BRT_TZ) - start_time).total_seconds()
+
+
+def runtime_ticks(i):
+    return time.ticks_diff(time.ticks_ms(), start_ticks) / 1000
+
+
+def start_tag_isoformat(i):
+    return start_time.isoformat()
+
+
+def start_tag_cached(i):
+    return start_time_iso
+
+
+for name, fn in (
+    ("runtime, datetime", runtime_datetime),
+    ("runtime, ticks_ms", runtime_ticks),
+    ("start_time tag, isoformat", start_tag_isoformat),
+    ("start_time tag, cached", start_tag_cached),
+):
+    report(name, timeit(fn, 500), "us")
+    report(name, allocations(fn, 100), "bytes")
@@ -0,0 +1,88 @@
+# Accuracy and speed of the type K conversion in type_k.py against the math.pow
+# based implementation it replaced, over the full type K range and board
+# temperatures. Hardware free, runs on the board, the unix port or CPython:
+#
+#     mpr -d c9 -m . run benchmarks/bench_type_k.py
+#     PYTHONPATH=. python benchmarks/bench_type_k.py
+import math
+import type_k
+from benchmarks.bench_utils import timeit, report
+
+
+def legacy_compensated_temperature(TR, TAMB):
+    """Thermocouple.temperature_NIST as it was before type_k.py, minus the SPI read."""
+    VOUT = 0.041276 * (TR - TAMB)
+    if TAMB >= 0:
+        VREF = (
+            -0.176004136860e-01
+            + 0.389212049750e-01 * TAMB
+            + 0.185587700320e-04 * math.pow(TAMB, 2)
+            + -0.994575928740e-07 * math.pow(TAMB, 3)
+            + 0.318409457190e-09 * math.pow(TAMB, 4)
+            + -0.560728448890e-12 * math.pow(TAMB, 5)
+            + 0.560750590590e-15 * math.pow(TAMB, 6)
+            + -0.320207200030e-18 * math.pow(TAMB, 7)
+            + 0.971511471520e-22 * math.pow(TAMB, 8)
+            + -0.121047212750e-25 * math.pow(TAMB, 9)
+            + 0.1185976
+            * math.exp(-0.1183432e-03 * math.pow(TAMB - 0.1269686e03, 2))
+        )
+    else:
+        VREF = (
+            0.394501280250e-01 * TAMB
+            + 0.236223735980e-04 * math.pow(TAMB, 2)
+            + -0.328589067840e-06 * math.pow(TAMB, 3)
+            + -0.499048287770e-08 * math.pow(TAMB, 4)
+            + -0.675090591730e-10 * math.pow(TAMB, 5)
+            + -0.574103274280e-12 * math.pow(TAMB, 6)
+            + -0.310888728940e-14 * math.pow(TAMB, 7)
+            + -0.104516093650e-16 * math.pow(TAMB, 8)
+            + -0.198892668780e-19 * math.pow(TAMB, 9)
+            + -0.163226974860e-22 * math.pow(TAMB, 10)
+        )
+    VTOTAL = VOUT + VREF
+    if -5.891 <= VTOTAL <= 0:
+        DCOEF = (0.0000000e00, 2.5173462e01, -1.1662878e00, -1.0833638e00, -8.9773540e-01,
+                 -3.7342377e-01, -8.6632643e-02, -1.0450598e-02, -5.1920577e-04)
+    elif 0 < VTOTAL <= 20.644:
+        DCOEF = (0.000000e00, 2.508355e01, 7.860106e-02, -2.503131e-01, 8.315270e-02,
+                 -1.228034e-02, 9.804036e-04, -4.413030e-05, 1.057734e-06, -1.052755e-08)
+    elif 20.644 < VTOTAL <= 54.886:
+        DCOEF = (-1.318058e02, 4.830222e01, -1.646031e00, 5.464731e-02, -9.650715e-04,
+                 8.802193e-06, -3.110810e-08)
+    else:
+        return None
+    result = 0
+    for n, c in enumerate(DCOEF):
+        result += c * math.pow(VTOTAL, n)
+    return result
+
+
+def horner_compensated_temperature(TR, TAMB, table=None):
+    VREF = table.voltage(TAMB) if table else type_k.cold_junction_voltage(TAMB)
+    return type_k.voltage_to_temperature(type_k.MAX31855_SENSITIVITY * (TR - TAMB) + VREF)
+
+
+def run():
+    table = type_k.ColdJunctionTable()
+    # MAX31855 resolutions: 0.25 degC thermocouple, 0.0625 degC cold junction
+    readings = [(tr * 0.25, tamb * 0.0625) for tr in range(-800, 5400, 37) for tamb in range(-640, 2000, 53)]
+    worst_horner = 0
+    worst_table = 0
+    for tr, tamb in readings:
+        expected = legacy_compensated_temperature(tr, tamb)
+        if expected is None:
+            continue
+        worst_horner = max(worst_horner, abs(horner_compensated_temperature(tr, tamb) - expected))
+        worst_table = max(worst_table, abs(horner_compensated_temperature(tr, tamb, table) - expected))
+    print("%d readings from -200 to 1350 degC, cold junction -40 to 125 degC" % len(readings))
+    report("max error, Horner", worst_horner, "degC")
+    report("max error, Horner + cold junction table", worst_table, "degC")
+
+    n = len(readings)
+    report("legacy", timeit(lambda i: legacy_compensated_temperature(*readings[i % n]), 2000), "us/read")
+    report("Horner", timeit(lambda i: horner_compensated_temperature(*readings[i % n]), 2000), "us/read")
+    report("Horner + cold junction table", timeit(lambda i: horner_compensated_temperature(readings[i % n][0], readings[i % n][1], table), 2000), "us/read")
+
+
+run()
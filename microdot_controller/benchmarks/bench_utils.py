@@ -0,0 +1,69 @@
+# Small timing helpers shared by the benchmark scripts.
+#
+# The benchmarks are meant to run on the board, with the controller directory
+# mounted (run from microdot_controller/):
+#
+#     mpr -d c9 -m . run benchmarks/bench_profile.py
+#
+# Scripts that do not touch the hardware also run on the MicroPython unix port
+# or on CPython.
+import gc
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:  # CPython
+    from time import perf_counter
+
+    def ticks_us():
+        return int(perf_counter() * 1000000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+
+def mem_alloc():
+    """
+    Returns the number of heap bytes currently allocated, or None when the
+    interpreter does not expose it (CPython).
+    """
+    if hasattr(gc, "mem_alloc"):
+        return gc.mem_alloc()
+    return None
+
+
+def timeit(fn, iterations=1000):
+    """
+    Calls fn(i) `iterations` times and returns the mean cost in microseconds.
+    """
+    gc.collect()
+    start = ticks_us()
+    for i in range(iterations):
+        fn(i)
+    return ticks_diff(ticks_us(), start) / iterations
+
+
+def allocations(fn, iterations=100):
+    """
+    Returns the mean number of heap bytes allocated per fn(i) call, or None on
+    interpreters without gc.mem_alloc. Automatic collection is disabled while
+    measuring so that freed blocks are not recycled mid-run.
+    """
+    if mem_alloc() is None:
+        return None
+    gc.collect()
+    gc.disable()
+    try:
+        before = mem_alloc()
+        for i in range(iterations):
+            fn(i)
+        after = mem_alloc()
+    finally:
+        gc.enable()
+    return (after - before) / iterations
+
+
+def report(name, value, unit):
+    if value is None:
+        print("%-40s %12s" % (name, "n/a"))
+    else:
+        print("%-40s %12.4g %s" % (name, value, unit))
@@ -0,0 +1,82 @@
+# Websocket frame throughput for small (status) and 64 KB messages: sending
+# through WebSocket.send, encoding once for a broadcast, and receiving masked
+# client frames. Streams are in memory, so the numbers are the framing cost
+# only. Runs on the board or on the host:
+#
+#     mpr -d c9 -m . run benchmarks/bench_websocket.py
+#     python benchmarks/bench_websocket.py
+try:
+    from microdot.websocket import WebSocket
+    from benchmarks.bench_utils import allocations, report, timeit
+except ImportError:  # CPython, run from the benchmarks directory
+    from bench_keepalive import load_microdot
+    load_microdot()
+    from microdot.websocket import WebSocket
+    from bench_utils import allocations, report, timeit
+
+MASK = b"\x12\x34\x56\x78"
+SIZES = (("small", 96), ("64 KB", 65536))
+
+
+def run(coroutine):
+    # The in-memory streams never suspend, so no event loop is needed
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("stream suspended")
+
+
+class NullWriter:
+    async def awrite(self, data):
+        pass
+
+
+class FrameReader:
+    """Replays one encoded frame forever."""
+    def __init__(self, frame):
+        self.frame = memoryview(frame)
+        self.offset = 0
+
+    async def readinto(self, buf):
+        n = min(len(buf), len(self.frame) - self.offset)
+        buf[:n] = self.frame[self.offset:self.offset + n]
+        self.offset = (self.offset + n) % len(self.frame)
+        return n
+
+
+class FakeRequest:
+    def __init__(self, reader):
+        self.sock = (reader, NullWriter())
+
+
+def masked_frame(payload):
+    frame = WebSocket.encode(payload, WebSocket.BINARY)
+    header = len(frame) - len(payload)
+    frame[1] |= 0x80
+    masked = bytearray(frame[:header]) + MASK + bytearray(len(payload))
+    for i in range(len(payload)):
+        masked[header + 4 + i] = payload[i] ^ MASK[i & 3]
+    return masked
+
+
+def bench(name, size):
+    payload = bytes(i & 0xff for i in range(size))
+    ws = WebSocket(FakeRequest(FrameReader(masked_frame(payload))))
+    ws.max_message_length = size
+    iterations = 1000 if size < 1024 else 5
+    assert run(ws.receive()) == payload
+
+    for label, fn in (
+        ("send", lambda i: run(ws.send(payload))),
+        ("encode (broadcast)", lambda i: WebSocket.encode(payload)),
+        ("receive (masked)", lambda i: run(ws.receive())),
+    ):
+        us = timeit(fn, iterations)
+        report("%s %s time" % (name, label), us, "us/frame")
+        report("%s %s throughput" % (name, label), size / us, "MB/s")
+        report("%s %s heap" % (name, label), allocations(fn, iterations), "bytes/frame")
+
+
+for name, size in SIZES:
+    bench(name, size)
@@ -0,0 +1,32 @@
+# Imports the controller modules that do not need the board and prints the
+# time it took and the heap left, as one JSON line. Run by
+# tools/compare_frozen_boot.py under the MicroPython unix port, once with the
+# modules loaded from sources and once from a frozen image.
+import gc
+import time
+
+gc.collect()
+start = time.ticks_us()
+
+import logging
+import datetime
+import timezone
+import microdot
+import microdot.websocket
+import aiohttp
+import influxdb
+import offline_buffer
+import broadcaster
+import backlog
+import status_codec
+import profile_index
+import static_files
+import ring_buffer
+import type_k
+import scheduler
+import instrumentation
+import buffered_log
+
+elapsed_ms = time.ticks_diff(time.ticks_us(), start) / 1000
+gc.collect()
+print('{"import_ms": %.2f, "mem_free": %d, "mem_alloc": %d}' % (elapsed_ms, gc.mem_free(), gc.mem_alloc()))
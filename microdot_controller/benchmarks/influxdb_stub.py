@@ -0,0 +1,69 @@
+# Stand-in for the InfluxDB write endpoint, run on the host with CPython:
+#
+#     python benchmarks/influxdb_stub.py --port 8086
+#
+# Counts received points and requests, answers 204 like InfluxDB does, and can
+# simulate an outage: GET /down and GET /up toggle availability, GET /stats
+# returns the counters as JSON. --latency adds a delay to every write.
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+state = {"up": True, "requests": 0, "points": 0, "rejected": 0, "latency": 0.0}
+lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.startswith("/api/v2/write"):
+            return self._reply(404)
+        if not state["up"]:
+            with lock:
+                state["rejected"] += 1
+            return self._reply(503)
+        time.sleep(state["latency"])
+        with lock:
+            state["requests"] += 1
+            state["points"] += len([line for line in body.split(b"\n") if line.strip()])
+        self._reply(204)
+
+    def do_GET(self):
+        if self.path == "/down":
+            state["up"] = False
+        elif self.path == "/up":
+            state["up"] = True
+        elif self.path != "/stats":
+            return self._reply(404)
+        self._reply(200, json.dumps(state).encode())
+
+    def _reply(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8086)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every write")
+    args = parser.parse_args()
+    state["latency"] = args.latency
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print("InfluxDB stub listening on %s:%d" % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(state))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+
+DEFAULT_QUEUE_SIZE = 4  # Frames waiting per client before it is coalesced to the latest one
+
+log = logging.getLogger(__name__)
+
+
+class _Subscriber:
+    def __init__(self, ws):
+        self.ws = ws
+        self.queue = []
+        self.ready = asyncio.Event()
+        self.alive = True
+
+
+class Broadcaster:
+    """
+    Fans pre-encoded websocket frames out to many clients. Each client has a small
+    queue drained by its own task, so a slow client never delays the others or the
+    caller. Frames are full state snapshots: when a client falls behind, its queue
+    is collapsed to the latest frame instead of growing.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = {}
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, ws, first_frame=None):
+        subscriber = _Subscriber(ws)
+        if first_frame is not None:
+            subscriber.queue.append(first_frame)
+        self.subscribers[ws] = subscriber
+        asyncio.create_task(self._drain(subscriber))
+
+    def unsubscribe(self, ws):
+        subscriber = self.subscribers.pop(ws, None)
+        if subscriber:
+            subscriber.alive = False
+            subscriber.ready.set()
+
+    def publish(self, frame, resync=None):
+        """
+        Queues frame for every subscriber. For streams where frames depend on the
+        previous ones, resync() returns a self-contained frame that replaces the
+        queue of a client that fell behind; it is called at most once per publish.
+        """
+        resync_frame = None
+        for subscriber in self.subscribers.values():
+            if len(subscriber.queue) >= self.queue_size:
+                subscriber.queue.clear()
+                self.coalesced += 1
+                if resync is not None:
+                    if resync_frame is None:
+                        resync_frame = resync()
+                    subscriber.queue.append(resync_frame)
+                    subscriber.ready.set()
+                    continue
+            subscriber.queue.append(frame)
+            subscriber.ready.set()
+
+    async def _drain(self, subscriber):
+        try:
+            while subscriber.alive:
+                if not subscriber.queue:
+                    subscriber.ready.clear()
+                    await subscriber.ready.wait()
+                    continue
+                await subscriber.ws.send_frame(subscriber.queue.pop(0))
+        except Exception as e:
+            log.error("could not write to socket %s: %s", subscriber.ws, e)
+        if self.subscribers.get(subscriber.ws) is subscriber:
+            del self.subscribers[subscriber.ws]
@@ -0,0 +1,276 @@
+import asyncio
+import os
+import logging
+
+DEFAULT_BUFFER_SIZE = 4096  # Bytes of formatted records kept in RAM
+DEFAULT_BLOCK_SIZE = 1024  # Bytes per write to flash
+DEFAULT_FLUSH_INTERVAL = 5  # Seconds between flushes when the buffer is not full
+DEFAULT_MAX_KB = 64  # Size at which the log file is rotated
+DEFAULT_BACKUP_COUNT = 3  # Rotated files kept: name.1 (newest) ... name.N
+MIN_RECORD_SIZE = 16  # Bytes per record assumed when sizing the ring of record slots
+
+
+class BufferedFileHandler(logging.Handler):
+    """
+    Log handler that never writes to flash from the caller.
+
+    emit() formats the record into a fixed ring of slots in RAM. A background task
+    writes the buffered records to the log file in blocks, every flush_interval
+    seconds or as soon as half the buffer is used, yielding to the event loop
+    between blocks. When the buffer is full, DEBUG records are dropped first
+    (oldest first); records of higher levels are only dropped when no DEBUG record
+    is left to make room. The file is rotated once it grows past max_kb, keeping
+    backup_count older files.
+    """
+
+    def __init__(
+        self,
+        filename,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+        block_size=DEFAULT_BLOCK_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        max_kb=DEFAULT_MAX_KB,
+        backup_count=DEFAULT_BACKUP_COUNT,
+    ):
+        super().__init__()
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_size = max_kb * 1024
+        self.backup_count = backup_count
+        self.terminator = "\n"
+        # Ring of encoded records, oldest at _head. A dropped record leaves an
+        # empty slot (None) behind until the head moves past it.
+        slots = max(16, buffer_size // MIN_RECORD_SIZE)
+        self._slots = [None] * slots
+        self._levels = bytearray(slots)
+        self._head = 0
+        self._count = 0  # Slots in use, empty ones included
+        self._live = 0  # Records waiting to be written
+        self._size = 0  # ... and their bytes
+        self._in_flight = 0  # Slots at the head being written; left alone by _make_room()
+        self._draining = False
+        self._block = bytearray(block_size)
+        self._file = None
+        self._file_size = 0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._flush_event = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def emit(self, record):
+        if record.levelno < self.level:
+            return
+        # Records are reused by the logger, so only the formatted line is kept
+        line = (self.format(record) + self.terminator).encode()
+        if len(line) > self.buffer_size:
+            self.dropped += 1
+            return
+        slots = self._slots
+        while self._size + len(line) > self.buffer_size or self._count == len(slots):
+            if not self._make_room(record.levelno, self._count == len(slots)):
+                self.dropped += 1
+                return
+        i = (self._head + self._count) % len(slots)
+        slots[i] = line
+        self._levels[i] = min(record.levelno, 255)
+        self._count += 1
+        self._live += 1
+        self._size += len(line)
+        if self._size >= self.buffer_size // 2:
+            self._flush_event.set()
+
+    def _make_room(self, levelno, need_slot) -> bool:
+        """
+        Drops one buffered record: the oldest DEBUG one if any, else the oldest one.
+        Returns False when nothing can be dropped for a DEBUG record (no DEBUG
+        record buffered), or when only records being written are left.
+
+        When every slot is taken, only dropping the record at the head frees one,
+        so that record goes regardless of its level (and nothing can be dropped
+        while the head is being written).
+        """
+        slots = self._slots
+        n = len(slots)
+        if need_slot:
+            if self._in_flight or not self._count:
+                return False
+            victim = self._head  # Never an empty slot: _trim() moved past those
+        else:
+            victim = None
+            for k in range(self._in_flight, self._count):
+                i = (self._head + k) % n
+                if slots[i] is not None and self._levels[i] <= logging.DEBUG:
+                    victim = i
+                    break
+            if victim is None:
+                if levelno <= logging.DEBUG:
+                    return False
+                for k in range(self._in_flight, self._count):
+                    i = (self._head + k) % n
+                    if slots[i] is not None:
+                        victim = i
+                        break
+                if victim is None:
+                    return False
+        self._size -= len(slots[victim])
+        slots[victim] = None
+        self._live -= 1
+        self.dropped += 1
+        self._trim()
+        return True
+
+    def _trim(self):
+        # Moves the head past dropped records
+        if self._in_flight:
+            return
+        slots = self._slots
+        while self._count and slots[self._head] is None:
+            self._head = (self._head + 1) % len(slots)
+            self._count -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": self._live,
+            "pendingBytes": self._size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+        }
+
+    async def drain(self):
+        """
+        Writes the buffered records to the file, one block at a time. A record
+        leaves the buffer only once its block is written, so a failed write
+        keeps it for the next attempt.
+        """
+        if self._draining:
+            return  # Both drains would write the records at the head
+        self._draining = True
+        try:
+            await self._drain()
+        finally:
+            self._draining = False
+
+    async def _drain(self):
+        slots = self._slots
+        n = len(slots)
+        block = memoryview(self._block)
+        block_size = len(block)
+        # Records emitted while this flush yields go to the next one
+        remaining = self._count
+        while remaining:
+            used = 0
+            taken = 0
+            large = None
+            while taken < remaining:
+                line = slots[(self._head + taken) % n]
+                if line is None:
+                    taken += 1
+                    continue
+                if len(line) > block_size:
+                    if not used:
+                        large = line
+                        taken += 1
+                    break
+                if used + len(line) > block_size:
+                    break
+                block[used:used + len(line)] = line
+                used += len(line)
+                taken += 1
+            self._in_flight = taken
+            try:
+                if large is not None:
+                    await self._write(large)
+                elif used:
+                    await self._write(block[:used])
+            finally:
+                self._in_flight = 0
+            for _ in range(taken):
+                line = slots[self._head]
+                if line is not None:
+                    self._size -= len(line)
+                    self._live -= 1
+                    self.written += 1
+                    slots[self._head] = None
+                self._head = (self._head + 1) % n
+                self._count -= 1
+            remaining -= taken
+        self._trim()
+
+    async def _write(self, data):
+        if self._file is None:
+            self._open()
+        elif self._file_size + len(data) > self.max_size:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._file_size += len(data)
+        # Give the control loop a chance to run between blocks
+        await asyncio.sleep(0)
+
+    def _open(self):
+        self._file = open(self.filename, "ab")
+        try:
+            self._file_size = os.stat(self.filename)[6]
+        except OSError:
+            self._file_size = 0
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        try:
+            os.remove("%s.%d" % (self.filename, self.backup_count))
+        except OSError:
+            pass
+        for i in range(self.backup_count - 1, 0, -1):
+            try:
+                os.rename("%s.%d" % (self.filename, i), "%s.%d" % (self.filename, i + 1))
+            except OSError:
+                pass  # Fewer backups than backup_count so far
+        try:
+            if self.backup_count:
+                os.rename(self.filename, self.filename + ".1")
+            else:
+                os.remove(self.filename)
+        except OSError:
+            pass
+        self.rotations += 1
+        self._open()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.drain()
+            except OSError as e:
+                # Nothing to log to; keep running and retry on the next tick
+                print("Could not write log file %s: %s" % (self.filename, e))
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except OSError:
+                        pass
+                    self._file = None
+
+    def close(self):
+        # Synchronous last flush, used by logging.shutdown()
+        slots = self._slots
+        if self._live:
+            if self._file is None:
+                self._open()
+            for k in range(self._count):
+                i = (self._head + k) % len(slots)
+                if slots[i] is not None:
+                    self._file.write(slots[i])
+                    slots[i] = None
+            self.written += self._live
+            self._count = self._live = self._size = 0
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -20,6 +20,18 @@ log_level = logging.DEBUG
 # log_format = '%(asctime)s %(levelname)s %(name)s: %(message)s'
 # log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 log_format = '%(asctime)s.%(msecs)03d | %(name)s | %(levelname)s | %(message)s'
+# Records can also be kept on flash, written in the background (see buffered_log.py).
+# Off by default to spare the flash; a firing logs a few INFO lines per second.
+# log_file = "storage/logs/picoreflowd.log"
+log_file = None
+log_file_level = logging.WARNING
+log_file_buffer_size = 4096  # Bytes of records kept in RAM between flushes
+log_file_flush_interval = 5  # Seconds
+log_file_max_kb = 64  # Rotate when the file reaches this size
+log_file_backup_count = 3  # Rotated files kept
+
+### Print per-module import time and heap cost at boot (see boot_profile.py), also served on /metrics
+boot_profile = False
 
 ### Server
 # listening_ip = "0.0.0.0"
@@ -57,6 +69,14 @@ gpio_sensor_data = 8
 gpio_thermocouple_vdd = 6
 gpio_thermocouple_gnd = 7
 
+### Interpolate the cold junction compensation from a precomputed table instead of
+### evaluating the full NIST polynomial on every read. Faster, but readings move
+### slightly (up to about 1.5e-4 degC, see benchmarks/bench_type_k.py); set to True to use it
+thermocouple_cold_junction_table = False
+
+### Hardware SPI bus for the thermocouple (None to bit-bang with SoftSPI)
+thermocouple_spi_id = 1
+
 ### Thermocouple SPI Connection (using adafrut drivers + kernel SPI interface)
 spi_sensor_chip_id = 0
 
@@ -67,12 +87,23 @@ sensor_time_wait = 1
 ## Temperature oversampling rate to get more stable readings
 temperature_oversamples = 10 # Number of samples observed between each "sensor_time_wait"
 
+### Loop phases, in seconds after each sensor_time_wait boundary (see scheduler.py). A sensor
+### sample is taken on the boundary; the PID tick follows once it is done, the status broadcast later.
+control_phase_offset = 0.05
+watcher_phase_offset = 0.5
+
 ### Number of samples to average for the temperature reading
 temperature_averaging_window = 30
 
 ### Number of attempts to read the thermocouple before giving up
 sensor_retry_attempts = 5
 
+### Seconds between refreshes of the board temperature, disk and memory status
+device_status_interval = 30
+
+### Seconds between loop timing points written to InfluxDB (see instrumentation.py), None to disable
+metrics_influx_interval = 60
+
 ########################################################################
 #
 #   PID parameters
@@ -122,3 +153,14 @@ influxdb_organization = "danko"
 influxdb_bucket = "sandbox"
 # influxdb_instance_name = "development_fake_kiln"
 influxdb_instance_name = "my_test_kiln_go"
+
+### Points are queued in RAM and sent in batches by a background task
+influxdb_buffer_size = 120     # Max points kept while waiting to be sent (oldest are dropped)
+influxdb_batch_size = 20       # Points per POST
+influxdb_flush_interval = 10   # Seconds between flushes when the batch is not full
+influxdb_request_timeout = 10  # Seconds before a POST counts as failed (and its points go offline)
+
+### Points that could not be sent are kept on flash and replayed when the server is back
+influxdb_offline_dir = "storage/influxdb_offline"
+influxdb_offline_max_kb = 1024             # Flash budget for the offline buffer (~600 bytes per point)
+influxdb_offline_max_disk_fraction = 0.5   # ... but never more than this share of the free flash
@@ -1,6 +1,9 @@
+import asyncio
 import esp32
 import os
 import gc
+import time
+from instrumentation import Instrumentation
 
 def get_board_temperature() -> int:
     temp = esp32.mcu_temperature()
@@ -18,7 +21,7 @@ def get_disk_status():
     }
 
 def get_memory_status():
-    gc.collect()
+    Instrumentation().collect()  # Timed, see /metrics
     memory_free = gc.mem_free()
     memory_allocated = gc.mem_alloc()
     memory_total = memory_free+memory_allocated
@@ -26,3 +29,36 @@ def get_memory_status():
         'memoryUsed': memory_allocated,
         'memoryTotal': memory_total
     }
+
+
+class DeviceStatusSampler:
+    """
+    Refreshes the board temperature, disk and memory metrics on a slow cadence so
+    that readers (Oven.get_state) never pay for gc.collect() or statvfs themselves.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.snapshot = {}
+        self.sampled_at = None  # time.ticks_ms() of the last refresh
+
+    def sample(self):
+        snapshot = {"boardTemperature": get_board_temperature()}
+        snapshot.update(get_disk_status())
+        snapshot.update(get_memory_status())
+        self.snapshot = snapshot
+        self.sampled_at = time.ticks_ms()
+        return snapshot
+
+    def age(self):
+        """
+        Seconds since the last refresh, or None if no sample was taken yet.
+        """
+        if self.sampled_at is None:
+            return None
+        return time.ticks_diff(time.ticks_ms(), self.sampled_at) / 1000
+
+    async def run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
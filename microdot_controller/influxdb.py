@@ -1,11 +1,16 @@
-import requests
-import aiohttp
 import asyncio
+import time
 from singleton import singleton
 from time_keeper import TimeKeeper
+from offline_buffer import OfflineBuffer
 
 time_keeper = TimeKeeper()
 
+DEFAULT_BUFFER_SIZE = 120  # Points kept in RAM while waiting to be sent
+DEFAULT_BATCH_SIZE = 20  # Points sent in a single POST
+DEFAULT_FLUSH_INTERVAL = 10  # Seconds between flushes when the batch is not full
+DEFAULT_REQUEST_TIMEOUT = 10  # Seconds before a POST is given up (the HTTP client has no timeouts)
+
 @singleton
 class InfluxDB:
     instance_name: str
@@ -15,12 +20,49 @@ class InfluxDB:
 
     def __init__(self):
         self.configured = False
+        self._session = None
+        self._writer_task = None
+        self.offline_buffer = None
+        self._flush_event = asyncio.Event()
+        self._set_buffer_size(DEFAULT_BUFFER_SIZE)
+        self.batch_size = DEFAULT_BATCH_SIZE
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL
+        self.request_timeout = DEFAULT_REQUEST_TIMEOUT
+        self.queued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0
+        self.max_flush_ms = 0
 
-    def config(self, base_url, api_token, organization, bucket, instance_name):
+    def config(
+        self,
+        base_url,
+        api_token,
+        organization,
+        bucket,
+        instance_name,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        request_timeout=DEFAULT_REQUEST_TIMEOUT,
+        offline_buffer: OfflineBuffer=None,
+    ):
         self.instance_name = instance_name
         self.url = f"{base_url}/api/v2/write?org={organization}&bucket={bucket}&precision=s"
         self.headers = {"Authorization": f"Token {api_token}"}
+        import aiohttp  # Deferred so that importing this module does not load the HTTP client
+        self._session = aiohttp.ClientSession()
+        if buffer_size != self._buffer_size:
+            self._set_buffer_size(buffer_size)
+        self.batch_size = min(batch_size, buffer_size)
+        self.flush_interval = flush_interval
+        self.request_timeout = request_timeout
+        # Failed batches are spilled here and replayed once the server answers again
+        self.offline_buffer = offline_buffer
         self.configured = True
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer_loop())
 
 
     def write(self, fields: dict, tags: dict, timestamp: int=None):
@@ -28,6 +70,7 @@ class InfluxDB:
             timestamp = time_keeper.get_epoch()
         if not self.configured:
             raise Exception("InfluxDB not configured. Call config() method first.")
+        import requests
         try:
             data = self._format_data(fields, tags, timestamp)
             response = requests.post(self.url, headers=self.headers, data=data, timeout=2)
@@ -43,21 +86,147 @@ class InfluxDB:
         if not self.configured:
             raise Exception("InfluxDB not configured. Call config() method first.")
         try:
-            data = self._format_data(fields, tags, timestamp)
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.url, data=data, headers=self.headers) as response:
-                    if response.status != 204:
-                        error_text = await response.read()
-                        raise Exception(f"Error writing to InfluxDB: {error_text}")
-                    return True
+            return await self._post(self._format_data(fields, tags, timestamp))
         except Exception as e:
             return False
 
     # a good name fot the method that will write data to influxdb triggering an async write but not waiting for the result. It should nor be "async_write" or "write_async".
     def fire_write(self, fields: dict, tags: dict, timestamp: int=None):
-        asyncio.create_task(
-            self.async_write(fields, tags, timestamp)
-        )
+        """
+        Queues a point for the background writer and returns immediately.
+        When the buffer is full the oldest queued point is dropped.
+        """
+        if not self.configured:
+            self.dropped += 1
+            return
+        if timestamp is None:
+            timestamp = time_keeper.get_epoch()
+        self._enqueue(self._format_data(fields, tags, timestamp))
+
+    def get_stats(self) -> dict:
+        stats = self.offline_buffer.get_stats() if self.offline_buffer else {}
+        stats.update({
+            "influxdb_queued": self.queued,
+            "influxdb_pending": self._count,
+            "influxdb_sent": self.sent,
+            "influxdb_dropped": self.dropped,
+            "influxdb_failed_flushes": self.failed_flushes,
+            "influxdb_last_flush_ms": self.last_flush_ms,
+            "influxdb_max_flush_ms": self.max_flush_ms,
+        })
+        return stats
+
+    def _set_buffer_size(self, size):
+        self._buffer_size = size
+        self._buffer = [None] * size
+        self._head = 0  # Oldest pending point
+        self._count = 0
+        self._in_flight = 0  # Points at the head that belong to the batch being sent
+
+    def _enqueue(self, line: str):
+        if self._count == self._buffer_size:
+            # Backpressure: overwrite the oldest point
+            self._buffer[self._head] = None
+            self._head = (self._head + 1) % self._buffer_size
+            self._count -= 1
+            if self._in_flight:
+                self._in_flight -= 1  # Already on its way to the server
+            else:
+                self.dropped += 1
+        self._buffer[(self._head + self._count) % self._buffer_size] = line
+        self._count += 1
+        self.queued += 1
+        if self._count >= self.batch_size:
+            self._flush_event.set()
+
+    def _peek_batch(self) -> list:
+        count = min(self._count, self.batch_size)
+        return [self._buffer[(self._head + i) % self._buffer_size] for i in range(count)]
+
+    def _discard(self, count: int):
+        for _ in range(count):
+            self._buffer[self._head] = None
+            self._head = (self._head + 1) % self._buffer_size
+        self._count -= count
+
+    async def _post(self, data: str) -> bool:
+        async with self._session.post(self.url, data=data, headers=self.headers) as response:
+            if response.status != 204:
+                error_text = await response.read()
+                raise Exception(f"Error writing to InfluxDB: {error_text}")
+            return True
+
+    async def flush(self) -> bool:
+        """
+        Sends up to batch_size pending points as a single multi-line POST.
+        If the request fails or times out the points are moved to the offline
+        buffer, or stay queued when there is none.
+        """
+        if not self.configured or self._count == 0:
+            return True
+        batch = self._peek_batch()
+        self._in_flight = len(batch)
+        start = time.ticks_ms()
+        try:
+            # A stalled connection would otherwise block the writer for good
+            await asyncio.wait_for(self._post("\n".join(batch)), self.request_timeout)
+            remaining = self._in_flight
+        except Exception as e:
+            self.failed_flushes += 1
+            # Batch points overwritten during the request are lost after all
+            self.dropped += len(batch) - self._in_flight
+            if self.offline_buffer and self._in_flight:
+                self._spill(batch[len(batch) - self._in_flight:])
+            return False
+        finally:
+            self._in_flight = 0
+            self.last_flush_ms = time.ticks_diff(time.ticks_ms(), start)
+            if self.last_flush_ms > self.max_flush_ms:
+                self.max_flush_ms = self.last_flush_ms
+        self._discard(remaining)
+        self.sent += len(batch)
+        return True
+
+    def _spill(self, lines):
+        try:
+            stored = self.offline_buffer.append(lines)
+        except OSError as e:
+            # Flash full or unavailable: keep the points queued in RAM
+            return
+        self.dropped += len(lines) - stored
+        self._discard(len(lines))
+
+    async def replay(self) -> bool:
+        """
+        Sends one batch of points from the offline buffer.
+        """
+        lines = self.offline_buffer.read(self.batch_size)
+        if not lines:
+            return True
+        try:
+            await asyncio.wait_for(self._post("\n".join(lines)), self.request_timeout)
+        except Exception as e:
+            self.failed_flushes += 1
+            return False
+        self.offline_buffer.consume(len(lines))
+        return True
+
+    async def _writer_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            # Drain full batches back to back, stop on the first failure
+            online = True
+            while self._count:
+                online = await self.flush()
+                if not online or self._count < self.batch_size:
+                    break
+            # Replay the offline backlog while the server answers and live points are few
+            while online and self.offline_buffer and self.offline_buffer.pending and self._count < self.batch_size:
+                online = await self.replay()
 
     @staticmethod
     def _format(dict_data: dict) -> str:
@@ -77,4 +246,4 @@ class InfluxDB:
         tag_set = self._format(tags)
         field_set = self._format(fields)
         data = f"{self.instance_name},{tag_set} {field_set} {timestamp}"
-        return data
\ No newline at end of file
+        return data
@@ -0,0 +1,165 @@
+import asyncio
+import gc
+import time
+from array import array
+from singleton import singleton
+
+# Upper bucket bounds in ms; the last bucket counts everything above the last bound
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of millisecond durations. record() only updates
+    preallocated counters, so it can run every tick without allocating.
+
+    Besides the totals, it keeps a second set of counts for the current interval,
+    which interval_stats() reports and restarts (used for the InfluxDB points).
+    """
+
+    def __init__(self, bounds=BUCKET_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = array("I", [0] * (len(bounds) + 1))
+        self.interval_counts = array("I", [0] * (len(bounds) + 1))
+        self.count = 0
+        self.total_ms = 0
+        self.max_ms = 0
+        self.interval_max_ms = 0
+
+    def record(self, value_ms):
+        bounds = self.bounds
+        i = 0
+        n = len(bounds)
+        while i < n and value_ms > bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.interval_counts[i] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+        if value_ms > self.interval_max_ms:
+            self.interval_max_ms = value_ms
+
+    def _percentile(self, counts, fraction):
+        """
+        Upper bound of the bucket holding the given fraction of the samples, or
+        None above the last bound (the max is the better figure there).
+        """
+        total = sum(counts)
+        if not total:
+            return 0
+        target = total * fraction
+        seen = 0
+        for i in range(len(counts)):
+            seen += counts[i]
+            if seen >= target:
+                return self.bounds[i] if i < len(self.bounds) else None
+        return None
+
+    def get_stats(self) -> dict:
+        return {
+            "count": self.count,
+            "meanMs": self.total_ms / self.count if self.count else 0,
+            "maxMs": self.max_ms,
+            "p50Ms": self._percentile(self.counts, 0.5),
+            "p95Ms": self._percentile(self.counts, 0.95),
+            "p99Ms": self._percentile(self.counts, 0.99),
+            "bucketsMs": list(self.bounds),
+            "counts": list(self.counts),
+        }
+
+    def interval_stats(self) -> dict:
+        counts = self.interval_counts
+        stats = {
+            "count": sum(counts),
+            "maxMs": self.interval_max_ms,
+            "p95Ms": self._percentile(counts, 0.95),
+        }
+        for i in range(len(counts)):
+            counts[i] = 0
+        self.interval_max_ms = 0
+        return stats
+
+
+class TaskMetrics:
+    """
+    Timing of one periodic loop: how late each run started relative to its
+    deadline, and how long it ran until it waited again.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lateness = Histogram()
+        self.execution = Histogram()
+        self._started = None  # ticks_ms() at which the current run started
+
+    def start(self, lateness_ms):
+        self.lateness.record(lateness_ms)
+        self._started = time.ticks_ms()
+
+    def stop(self):
+        if self._started is not None:
+            self.execution.record(time.ticks_diff(time.ticks_ms(), self._started))
+            self._started = None
+
+
+@singleton
+class Instrumentation:
+    """
+    Collects the loop timings reported by scheduler.PeriodicTask and the
+    duration of garbage collections run through collect(). Read through the
+    /metrics endpoint, and written to InfluxDB by run() when enabled.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+        self.gc = Histogram()
+
+    def task(self, name) -> TaskMetrics:
+        metrics = self.tasks.get(name)
+        if metrics is None:
+            metrics = self.tasks[name] = TaskMetrics(name)
+        return metrics
+
+    def collect(self):
+        """
+        gc.collect(), timed. Collections triggered by an allocation are not seen
+        here; they show up in the execution time of the loop they interrupted.
+        """
+        start = time.ticks_ms()
+        gc.collect()
+        self.gc.record(time.ticks_diff(time.ticks_ms(), start))
+
+    def get_metrics(self) -> dict:
+        return {
+            "tasks": {
+                name: {"lateness": m.lateness.get_stats(), "execution": m.execution.get_stats()}
+                for name, m in self.tasks.items()
+            },
+            "gc": self.gc.get_stats(),
+        }
+
+    async def run(self, influxdb, interval, tags=None):
+        """
+        Writes one point per loop every `interval` seconds with the worst and 95th
+        percentile timings of that interval, plus one point for the collections.
+        """
+        tags = dict(tags or {}, stage="loop_metrics")
+        while True:
+            await asyncio.sleep(interval)
+            for name, metrics in self.tasks.items():
+                lateness = metrics.lateness.interval_stats()
+                execution = metrics.execution.interval_stats()
+                influxdb.fire_write({
+                    "runs": lateness["count"],
+                    "lateness_max_ms": lateness["maxMs"],
+                    "lateness_p95_ms": lateness["p95Ms"] or lateness["maxMs"],
+                    "execution_max_ms": execution["maxMs"],
+                    "execution_p95_ms": execution["p95Ms"] or execution["maxMs"],
+                }, dict(tags, task=name))
+            collections = self.gc.interval_stats()
+            influxdb.fire_write({
+                "collections": collections["count"],
+                "gc_max_ms": collections["maxMs"],
+            }, dict(tags, task="gc"))
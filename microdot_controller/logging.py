@@ -28,15 +28,26 @@ _default_datefmt = "%Y-%m-%d %H:%M:%S"
 
 
 class LogRecord:
-    def set(self, name, level, message):
+    def set(self, name, level, msg, args=None):
         self.name = name
         self.levelno = level
         self.levelname = _level_dict[level]
-        self.message = message
+        self.msg = msg
+        self.args = args
+        self.message = None
         self.ct = time.time()
         self.msecs = time.ticks_ms()%1000
         self.asctime = None
 
+    def getMessage(self):
+        # Formatted on first use and shared by all handlers
+        if self.message is None:
+            msg = self.msg
+            if self.args:
+                msg = msg % self.args
+            self.message = msg
+        return self.message
+
 
 class Handler:
     def __init__(self, level=NOTSET):
@@ -98,7 +109,7 @@ class Formatter:
             record.asctime = self.formatTime(self.datefmt, record)
         return self.fmt % {
             "name": record.name,
-            "message": record.message,
+            "message": record.getMessage(),
             "msecs": record.msecs,
             "asctime": record.asctime,
             "levelname": record.levelname,
@@ -111,23 +122,28 @@ class Logger:
         self.level = level
         self.handlers = []
         self.record = LogRecord()
+        # Effective level, None until computed. Cleared whenever a level changes.
+        self._effective_level = None
 
     def setLevel(self, level):
         self.level = level
+        _clear_cache()
 
     def isEnabledFor(self, level):
-        return level >= self.getEffectiveLevel()
+        effective_level = self._effective_level
+        if effective_level is None:
+            effective_level = self._effective_level = self.getEffectiveLevel()
+        return level >= effective_level
 
     def getEffectiveLevel(self):
         return self.level or getLogger().level or _DEFAULT_LEVEL
 
     def log(self, level, msg, *args):
+        # The message is only formatted if a handler emits the record
         if self.isEnabledFor(level):
-            if args:
-                if isinstance(args[0], dict):
-                    args = args[0]
-                msg = msg % args
-            self.record.set(self.name, level, msg)
+            if args and isinstance(args[0], dict):
+                args = args[0]
+            self.record.set(self.name, level, msg, args)
             handlers = self.handlers
             if not handlers:
                 handlers = getLogger().handlers
@@ -168,6 +184,11 @@ class Logger:
         return len(self.handlers) > 0
 
 
+def _clear_cache():
+    for logger in _loggers.values():
+        logger._effective_level = None
+
+
 def getLogger(name=None):
     if name is None:
         name = "root"
@@ -1,240 +1,159 @@
 import os
+import asyncio
 import logging
 import config
-from pid_config import pid_config
+from boot_profile import BootProfile
+
+boot = BootProfile(enabled=config.boot_profile)
 
 log_level = config.log_level
 log_format = config.log_format
 logging.basicConfig(level=log_level, format=log_format)
-logging.info(f"Configured logging... Level: {log_level}, Format: {log_format}")
-
-from wifi_utils import connect_to_wifi
-from machine import Pin
-from microdot import Microdot, send_file, redirect
-from microdot.websocket import with_websocket, WebSocketError
-import time
-import json
-import ntptime
-from oven import Oven, Profile
-from ovenWatcher import OvenWatcher
-from influxdb import InfluxDB
-
-
+if config.log_file:
+    from buffered_log import BufferedFileHandler
+    try:
+        os.mkdir(config.log_file.rsplit("/", 1)[0])
+    except OSError:
+        pass  # Already exists
+    log_file_handler = BufferedFileHandler(
+        config.log_file,
+        buffer_size=config.log_file_buffer_size,
+        flush_interval=config.log_file_flush_interval,
+        max_kb=config.log_file_max_kb,
+        backup_count=config.log_file_backup_count,
+    )
+    log_file_handler.setLevel(config.log_file_level)
+    log_file_handler.setFormatter(logging.Formatter(log_format))
+    logging.getLogger().addHandler(log_file_handler)
+logging.info("Configured logging... Level: %s, Format: %s", log_level, log_format)
 
 log = logging.getLogger("picoreflowd")
 log.info("Starting picoreflowd")
 
-log.debug("Connecting to WiFi...")
-connect_to_wifi()
-log.info("Connected to WiFi")
-
-log.debug("Synchronizing time with NTP server...")
-ntptime.settime()
-log.info("Time synchronized with NTP server")
-
-LED = Pin(15, Pin.OUT)    # create output pin on GPIO0
-
-
-app = Microdot()
+# Stage 1: heater off and temperature control running before anything else.
+# Importing oven drives the heater PWM to 0; Oven() schedules the sensor and PID tasks.
+boot.load("oven")
+from oven import Oven
 oven = Oven()
-ovenWatcher = OvenWatcher(oven)
-influxDB = InfluxDB()
-script_dir = os.getcwd()
-profile_path = script_dir+("/").join(["storage", "profiles"])
-
-influxDB.config(
-    base_url=config.influxdb_base_url,
-    api_token=config.influxdb_api_token,
-    organization=config.influxdb_organization,
-    bucket=config.influxdb_bucket,
-    instance_name=config.influxdb_instance_name
-)
-
-@app.route('/')
-async def index(request):
-    # return 'Hello, world!'
-    return redirect('/picoreflow/index.html')
-
-@app.route('/health')
-async def index(request):
-    return 'OK'
-
-@app.route('/parameters', methods=['GET', 'POST'])
-async def parameters(request):
-    if request.method == "GET":
-        return json.dumps(pid_config.get_pid_config())
-    elif request.method == "POST":
-        data = request.json
-        log.info("Received parameters: %s" % data) # Received parameters: {'coefficient': 'kp', 'value': '32'}
-        pid_config.set_config(name=data.get('coefficient'), value=float(data.get('value')))
-        return json.dumps({"status": "success", "message": "Parameters updated"})
-
-
-@app.route('/status')
-@with_websocket
-async def status(request, ws):
-    log.info("websocket (status) opened")
-    await ovenWatcher.add_observer(ws)
-    while True:
-        try:
-            message = await ws.receive()
-            await ws.send("Your message was: %r" % message)
-        except WebSocketError:
-            break
-    log.info("websocket (status) closed")
-
-@app.route('/picoreflow/<path:path>')
-async def public(request, path):
-    if '..' in path:
-        # directory traversal is not allowed
-        return 'Not found', 404
-    return send_file('public/' + path, max_age=86400)
-
-@app.route('/control')
-@with_websocket
-async def control(request, ws):
-    log.info("websocket (control) opened")
-    while True:
-        try:
-            message = await ws.receive()
-            log.info("Received (control): %s" % message)
-            msgdict = json.loads(message)
-            if msgdict.get("cmd") == "RUN":
-                log.info("RUN command received")
-                profile_obj = msgdict.get('profile')
-                if profile_obj:
-                    profile_json = json.dumps(profile_obj)
-                    profile = Profile(profile_json)
-                expected_observations = profile.get_duration() / oven.time_step
-                backlog_undersampling_factor = int(expected_observations/100)+1
-                log.debug(f"Expected observations: {expected_observations}")
-                log.debug(f"Backlog undersampling factor: {backlog_undersampling_factor}")
-                log.debug(f"Expected to observe every {oven.time_step * backlog_undersampling_factor} seconds") 
-                oven.run_profile(profile, backlog_undersampling_factor)
-                ovenWatcher.record(profile)
-            elif msgdict.get("cmd") == "STOP":
-                log.info("Stop command received")
-                oven.abort_run()
-        except WebSocketError:
-            break
-    log.info("websocket (control) closed")
+boot.mark("heater off")
+
+WIFI_RETRY_MIN = 5  # Seconds before the first WiFi retry, doubled after each failure
+WIFI_RETRY_MAX = 300
+NTP_RETRY = 60  # Seconds between NTP attempts until one succeeds
 
 
-@app.route('/storage')
-@with_websocket
-async def handle_storage(request, ws):
-    log.info("websocket (storage) opened")
+async def connect_network():
+    # Retries until connected: the sensor and PID tasks keep running meanwhile
+    boot.load("wifi_utils")
+    from wifi_utils import connect_to_wifi_async
+    retry = WIFI_RETRY_MIN
     while True:
+        log.debug("Connecting to WiFi...")
         try:
-            message = await ws.receive()
-            if not message:
+            if await connect_to_wifi_async():
                 break
-            log.debug("websocket (storage) received: %s" % message)
-
-            try:
-                msgdict = json.loads(message)
-            except:
-                msgdict = {}
-
-            if message == "GET":
-                log.info("GET command recived")
-                await ws.send(get_profiles())
-            elif msgdict.get("cmd") == "DELETE":
-                log.info("DELETE command received")
-                profile_obj = msgdict.get('profile')
-                if delete_profile(profile_obj):
-                  msgdict["resp"] = "OK"
-                await ws.send(json.dumps(msgdict))
-                #wsock.send(get_profiles())
-            elif msgdict.get("cmd") == "PUT":
-                log.info("PUT command received")
-                profile_obj = msgdict.get('profile')
-                force = msgdict.get('force', False)
-                if profile_obj:
-                    #del msgdict["cmd"]
-                    if save_profile(profile_obj, force):
-                        msgdict["resp"] = "OK"
-                    else:
-                        msgdict["resp"] = "FAIL"
-                    log.debug("websocket (storage) sent: %s" % message)
-
-                    await ws.send(json.dumps(msgdict))
-                    await ws.send(get_profiles())
-        except WebSocketError:
-            break
-    log.info("websocket (storage) closed")
-
-@app.route('/config')
-@with_websocket
-async def handle_config(request, ws):
-    log.info("websocket (config) opened")
+            log.error("Could not connect to WiFi, retrying in %d s", retry)
+        except Exception as e:
+            log.error("WiFi connection failed (%s), retrying in %d s", e, retry)
+        await asyncio.sleep(retry)
+        retry = min(retry * 2, WIFI_RETRY_MAX)
+    log.info("Connected to WiFi")
+
+
+async def sync_clock(attempts=None) -> bool:
+    # Tries `attempts` times (forever when None); False if none succeeded
+    boot.load("ntptime")
+    import ntptime
     while True:
+        log.debug("Synchronizing time with NTP server...")
         try:
-            message = await ws.receive()
-            print("Received message (config):", message)
-            await ws.send(get_config())
-        except WebSocketError:
+            ntptime.settime()
             break
-    log.info("websocket (config) closed")
-
-
-def get_profiles():
-    try:
-        profile_files = os.listdir(profile_path)
-    except:
-        profile_files = []
-    profiles = []
-    for filename in profile_files:
-        with open((profile_path+"/"+filename), 'r') as f:
-            profiles.append(json.load(f))
-    return json.dumps(profiles)
-
-def exists(path):
-    try:
-        os.stat(path)
-        return True
-    except OSError:
-        return False
-
-def save_profile(profile, force=False):
-    profile_json = json.dumps(profile)
-    filename = profile['name']+".json"
-    filepath = profile_path+"/"+filename
-    log.debug("Saving profile to %s" % filepath)
-    if not force and exists(filepath):
-        log.error("Could not write, %s already exists" % filepath)
-        return False
-    with open(filepath, 'w+') as f:
-        f.write(profile_json)
-        f.close()
-    log.info("Wrote %s" % filepath)
+        except Exception as e:
+            log.warning("NTP synchronization failed: %s", e)
+        if attempts is not None:
+            attempts -= 1
+            if attempts <= 0:
+                return False
+        await asyncio.sleep(NTP_RETRY)
+    log.info("Time synchronized with NTP server")
+    # Take the idle start time again now that the wall clock is right; a firing
+    # in progress keeps its start (runtime is measured on ticks_ms anyway)
+    if oven.state == Oven.STATE_IDLE:
+        oven.reset()
     return True
 
-def delete_profile(profile):
-    profile_json = json.dumps(profile)
-    filename = profile['name']+".json"
-    filepath = profile_path+"/"+filename
-    # TODO: delete the file
-    # os.remove(filepath)
-    log.info("Deleted %s" % filepath)
-    return True
 
-def get_config():
-    print("Getting config")
-    return json.dumps({"temp_scale": config.temp_scale,
-        "time_scale_slope": config.time_scale_slope,
-        "time_scale_profile": config.time_scale_profile,
-        "kwh_rate": config.kwh_rate,
-        "currency_type": config.currency_type})    
-
-def main():
-    log.debug("Starting main function")
-    if connect_to_wifi():
-        log.debug("Connected to WiFi")
-        log.debug("Stating web server...")
-        app.run()
-    log.debug("Web server stopped")
+async def main():
+    # Let the sensor start sampling before the network is brought up
+    await asyncio.sleep(0)
+    boot.mark("sensor running")
+
+    # Stage 2: network, imported only now
+    await connect_network()
+    from machine import Pin
+    LED = Pin(15, Pin.OUT)    # create output pin on GPIO0
+    # One attempt before telemetry starts; if NTP does not answer, keep trying in
+    # the background instead of holding up (or ending) the boot
+    if not await sync_clock(attempts=1):
+        log.warning("Continuing without NTP time, retrying every %d s", NTP_RETRY)
+        asyncio.create_task(sync_clock())
+    boot.mark("network")
+
+    # Stage 3: telemetry and the web stack
+    boot.load("influxdb")
+    boot.load("offline_buffer")
+    from influxdb import InfluxDB
+    from offline_buffer import OfflineBuffer
+    from instrumentation import Instrumentation
+    influxDB = InfluxDB()
+    influxDB.config(
+        base_url=config.influxdb_base_url,
+        api_token=config.influxdb_api_token,
+        organization=config.influxdb_organization,
+        bucket=config.influxdb_bucket,
+        instance_name=config.influxdb_instance_name,
+        buffer_size=config.influxdb_buffer_size,
+        batch_size=config.influxdb_batch_size,
+        flush_interval=config.influxdb_flush_interval,
+        request_timeout=config.influxdb_request_timeout,
+        offline_buffer=OfflineBuffer(
+            config.influxdb_offline_dir,
+            max_kb=config.influxdb_offline_max_kb,
+            max_disk_fraction=config.influxdb_offline_max_disk_fraction
+        )
+    )
+    instrumentation = Instrumentation()
+    if config.metrics_influx_interval:
+        asyncio.create_task(instrumentation.run(
+            influxDB, config.metrics_influx_interval, tags={"kiln_name": config.kiln_name}))
+    boot.mark("telemetry")
+
+    boot.load("ovenWatcher")
+    boot.load("profile_index")
+    boot.load("static_files")
+    boot.load("web")
+    from ovenWatcher import OvenWatcher
+    from profile_index import ProfileIndex
+    from static_files import StaticFiles
+    from web import create_app
+    ovenWatcher = OvenWatcher(oven)
+    script_dir = os.getcwd()
+    profile_path = script_dir+("/").join(["storage", "profiles"])
+    profile_index = ProfileIndex(profile_path)
+    static_files = StaticFiles('public', max_age=86400)
+    app = create_app(oven, ovenWatcher, influxDB, profile_index, static_files, instrumentation, boot)
+    boot.mark("web")
+    boot.report()
+
+    log.debug("Stating web server...")
+    try:
+        await app.start_server()
+        log.warning("Web server stopped")
+    except Exception as e:
+        log.exception("Web server failed", exc_info=e)
+    # Returning would end asyncio.run() and with it the sensor and PID tasks
+    await asyncio.Event().wait()
 
 log.debug("Stating main function...")
-main()
-log.debug
\ No newline at end of file
+asyncio.run(main())
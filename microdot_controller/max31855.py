@@ -1,8 +1,12 @@
-from machine import Pin, SoftSPI
-import math
+from machine import Pin, SoftSPI, SPI
 import time
+import type_k
+from max31855_reader import (
+    Max31855Reader, Max31855Reading, FAULT_OPEN_CIRCUIT, FAULT_SHORT_TO_GND, FAULT_SHORT_TO_VCC
+)
 
 D_MOSI_PIN = 15 # NOT_CONNECTED / MOSI / BOARD_LED
+HARDWARE_SPI_BAUDRATE = 1000000 # MAX31855 accepts up to 5 MHz
 
 
 class RawTemperatures:
@@ -45,8 +49,12 @@ class Thermocouple:
         d_mosi_pin=D_MOSI_PIN,
         d_3v3_pin=None,
         d_gnd_pin=None,
+        cold_junction_table=False,
+        spi_id=None,
     ) -> None:
         print("           Initializing Thermocouple...")
+        # Interpolated cold junction compensation instead of the full NIST polynomial
+        self.cold_junction_table = type_k.ColdJunctionTable() if cold_junction_table else None
         if not d_3v3_pin is None:
             print("           Setting up 3.3V pin...")
             d_3v3 = Pin(d_3v3_pin, Pin.OUT)
@@ -61,140 +69,72 @@ class Thermocouple:
         self.chip_select.off()
 
         # chip_select.on()
-        self.spi = SoftSPI(baudrate=100000, polarity=1, phase=0, sck=Pin(d_clk_pin), mosi=Pin(d_mosi_pin), miso=Pin(d_do_pin))
-        self.spi.init(baudrate=100000) # set the baudrate
+        self.spi = None
+        if spi_id is not None:
+            # Hardware SPI routes the signals through the GPIO matrix; fall back to bit-banging
+            # if the port rejects these pins.
+            try:
+                self.spi = SPI(spi_id, baudrate=HARDWARE_SPI_BAUDRATE, polarity=1, phase=0, sck=Pin(d_clk_pin), mosi=Pin(d_mosi_pin), miso=Pin(d_do_pin))
+                print("           Using hardware SPI", spi_id)
+            except (ValueError, OSError) as e:
+                print("           Hardware SPI unavailable, using SoftSPI:", e)
+        if self.spi is None:
+            self.spi = SoftSPI(baudrate=100000, polarity=1, phase=0, sck=Pin(d_clk_pin), mosi=Pin(d_mosi_pin), miso=Pin(d_do_pin))
+            self.spi.init(baudrate=100000) # set the baudrate
         self.chip_select.on()
+        self.reader = Max31855Reader(self.spi, self.chip_select)
+        self._reading = Max31855Reading()
+        self._raw_temps = RawTemperatures(0, 0)
         time.sleep(1)
 
+    def read_into(self, out: Max31855Reading) -> Max31855Reading:
+        """
+        Reads and decodes one frame into out without allocating. Faults are
+        reported in out.fault/out.faults, nothing is raised.
+        """
+        return self.reader.read_into(out)
+
     def read_temps(self) -> RawTemperatures:
-        self.chip_select.off()
-        buf = bytearray(4)     # create a buffer
-        self.spi.readinto(buf)       # read into the given buffer (reads 50 bytes in this case)
-        # print('buf:', buf)
-        bits = (buf[0] << 24) | (buf[1] << 16) | (buf[2] << 8) | (buf[3] << 0)
-        # print('bin:', bin(bits))
-
-        sign_bit = bits >> 31
-        if sign_bit:
+        reading = self.reader.read_into(self._reading)
+
+        if reading.negative:
             raise ThermocoupleError("Negative temp!!!")
 
-        fault_mask = 0b1 << 16
-        fault = bits & fault_mask
-        if fault:
+        if reading.fault:
             print("Fault")
 
-        shorted_to_vcc = bits & 0b100
-        if shorted_to_vcc:
+        if reading.faults & FAULT_SHORT_TO_VCC:
             raise ThermocoupleError("Shorted to vcc!!!")
 
-        shorted_to_gnd = bits & 0b10
-        if shorted_to_gnd:
+        if reading.faults & FAULT_SHORT_TO_GND:
             raise ThermocoupleError("Shorted to gnd!!!")
 
-        open_connection = bits & 0b1
-        if open_connection:
+        if reading.faults & FAULT_OPEN_CIRCUIT:
             raise ThermocoupleError("open connection!!!")
 
-        temp_digits = bits >> 18
-        temperature = temp_digits/4
-        # print(f"termocouple tempo: {temperature}°C")
-
-        junction_temp_mask = 0b1111111111110000
-        junction_temp_bits = (bits & junction_temp_mask) >> 4
-        junction_temp = junction_temp_bits/16
-        # print(f"junction tempo: {junction_temp}°C")
-        self.chip_select.on()
-
-        #return (temperature, junction_temp)
-        return RawTemperatures(temperature, junction_temp)
+        # The returned object is reused by the next read
+        self._raw_temps.raw_temperature = reading.raw_temperature
+        self._raw_temps.junction_temperature = reading.junction_temperature
+        return self._raw_temps
 
     def temperature_NIST(self) -> CompensatedTemperatures:
         raw_temps = self.read_temps()
         raw_temperature = raw_temps.raw_temperature
         junction_temp = raw_temps.junction_temperature
-        TR = raw_temperature
-        # temperature of device (cold junction)
-        TAMB = junction_temp
-        # thermocouple voltage based on MAX31855's uV/degC for type K (table 1)
-        VOUT = 0.041276 * (TR - TAMB)
         # cold junction equivalent thermocouple voltage
-        if TAMB >= 0:
-            VREF = (
-                -0.176004136860e-01
-                + 0.389212049750e-01 * TAMB
-                + 0.185587700320e-04 * math.pow(TAMB, 2)
-                + -0.994575928740e-07 * math.pow(TAMB, 3)
-                + 0.318409457190e-09 * math.pow(TAMB, 4)
-                + -0.560728448890e-12 * math.pow(TAMB, 5)
-                + 0.560750590590e-15 * math.pow(TAMB, 6)
-                + -0.320207200030e-18 * math.pow(TAMB, 7)
-                + 0.971511471520e-22 * math.pow(TAMB, 8)
-                + -0.121047212750e-25 * math.pow(TAMB, 9)
-                + 0.1185976
-                * math.exp(-0.1183432e-03 * math.pow(TAMB - 0.1269686e03, 2))
-            )
-        else:
-            VREF = (
-                0.394501280250e-01 * TAMB
-                + 0.236223735980e-04 * math.pow(TAMB, 2)
-                + -0.328589067840e-06 * math.pow(TAMB, 3)
-                + -0.499048287770e-08 * math.pow(TAMB, 4)
-                + -0.675090591730e-10 * math.pow(TAMB, 5)
-                + -0.574103274280e-12 * math.pow(TAMB, 6)
-                + -0.310888728940e-14 * math.pow(TAMB, 7)
-                + -0.104516093650e-16 * math.pow(TAMB, 8)
-                + -0.198892668780e-19 * math.pow(TAMB, 9)
-                + -0.163226974860e-22 * math.pow(TAMB, 10)
-            )
-        # total thermoelectric voltage
-        VTOTAL = VOUT + VREF
-        # determine coefficients
-        # https://srdata.nist.gov/its90/type_k/kcoefficients_inverse.html
-        if -5.891 <= VTOTAL <= 0:
-            DCOEF = (
-                0.0000000e00,
-                2.5173462e01,
-                -1.1662878e00,
-                -1.0833638e00,
-                -8.9773540e-01,
-                -3.7342377e-01,
-                -8.6632643e-02,
-                -1.0450598e-02,
-                -5.1920577e-04,
-            )
-        elif 0 < VTOTAL <= 20.644:
-            DCOEF = (
-                0.000000e00,
-                2.508355e01,
-                7.860106e-02,
-                -2.503131e-01,
-                8.315270e-02,
-                -1.228034e-02,
-                9.804036e-04,
-                -4.413030e-05,
-                1.057734e-06,
-                -1.052755e-08,
-            )
-        elif 20.644 < VTOTAL <= 54.886:
-            DCOEF = (
-                -1.318058e02,
-                4.830222e01,
-                -1.646031e00,
-                5.464731e-02,
-                -9.650715e-04,
-                8.802193e-06,
-                -3.110810e-08,
-            )
+        if self.cold_junction_table is not None:
+            VREF = self.cold_junction_table.voltage(junction_temp)
         else:
+            VREF = type_k.cold_junction_voltage(junction_temp)
+        # total thermoelectric voltage, using MAX31855's uV/degC for type K (table 1)
+        VTOTAL = type_k.MAX31855_SENSITIVITY * (raw_temperature - junction_temp) + VREF
+        COMPENSATED_TEMPERATURE = type_k.voltage_to_temperature(VTOTAL)
+        if COMPENSATED_TEMPERATURE is None:
             print("    ERRO!!! - VTOTAL out of range:", VTOTAL)
             raise ThermocoupleError(f"Total thermoelectric voltage out of range:{VTOTAL}")
         if (raw_temperature, junction_temp) == (0, 0):
             print("    ERRO!!! - Raw temperature and junction temperature are both zero")
             raise ThermocoupleError("Reading zeros for some reason")
-        # compute temperature
-        COMPENSATED_TEMPERATURE = 0
-        for n, c in enumerate(DCOEF):
-            COMPENSATED_TEMPERATURE += c * math.pow(VTOTAL, n)
         return CompensatedTemperatures(
             COMPENSATED_TEMPERATURE,
             raw_temperature,
@@ -215,14 +155,16 @@ class Thermocouple:
 
 
 class MAX31855:
-    def __init__(self, cs_pin, clock_pin, data_pin, d_3v3_pin=None, d_gnd_pin=None, units = "c"):
-        '''Initialize Soft (Bitbang) SPI bus
+    def __init__(self, cs_pin, clock_pin, data_pin, d_3v3_pin=None, d_gnd_pin=None, units = "c", cold_junction_table=False, spi_id=None):
+        '''Initialize the SPI bus: hardware SPI when spi_id is given and the pins allow it, Soft (Bitbang) SPI otherwise
 
         Parameters:
         - cs_pin:    Chip Select (CS) / Slave Select (SS) pin (Any GPIO)  
         - clock_pin: Clock (SCLK / SCK) pin (Any GPIO)
         - data_pin:  Data input (SO / MOSI) pin (Any GPIO)
         - units:     (optional) unit of measurement to return. ("c" (default) | "k" | "f")
+        - cold_junction_table: (optional) interpolate the cold junction compensation from a precomputed table
+        - spi_id:    (optional) hardware SPI bus to use instead of SoftSPI
 
         '''
         self.thermocouple = Thermocouple(
@@ -231,6 +173,8 @@ class MAX31855:
             d_do_pin=data_pin,
             d_3v3_pin=d_3v3_pin,
             d_gnd_pin=d_gnd_pin,
+            cold_junction_table=cold_junction_table,
+            spi_id=spi_id,
         )
         self.units = units.lower()
         self.data: CompensatedTemperatures
@@ -0,0 +1,76 @@
+# Allocation-free MAX31855 frame reader.
+#
+# Works with any object that has readinto(buf) (machine.SPI, machine.SoftSPI or a
+# mock bus) and a chip select with on()/off(), so the decoder can be exercised on
+# hosts without the machine module.
+
+FAULT_OPEN_CIRCUIT = 0b001
+FAULT_SHORT_TO_GND = 0b010
+FAULT_SHORT_TO_VCC = 0b100
+
+
+class Max31855Reading:
+    """
+    Decoded MAX31855 frame. Temperatures are kept as signed integer counts so that
+    decoding does not allocate; the float properties convert them on demand.
+    """
+    __slots__ = ("thermocouple_counts", "junction_counts", "fault", "faults")
+
+    def __init__(self):
+        self.thermocouple_counts = 0  # 0.25 degC per count
+        self.junction_counts = 0  # 0.0625 degC per count
+        self.fault = False
+        self.faults = 0  # FAULT_* bits
+
+    @property
+    def raw_temperature(self) -> float:
+        return self.thermocouple_counts / 4
+
+    @property
+    def junction_temperature(self) -> float:
+        return self.junction_counts / 16
+
+    @property
+    def negative(self) -> bool:
+        return self.thermocouple_counts < 0
+
+
+def decode_frame(buf, out: Max31855Reading) -> Max31855Reading:
+    """
+    Decodes the 4 byte frame in buf into out. The frame is handled as two 16 bit
+    halves so every intermediate value stays a small int.
+    """
+    high = (buf[0] << 8) | buf[1]
+    low = (buf[2] << 8) | buf[3]
+    # D31..D18: 14 bit two's complement thermocouple temperature
+    counts = high >> 2
+    if counts & 0x2000:
+        counts -= 0x4000
+    out.thermocouple_counts = counts
+    # D15..D4: 12 bit two's complement cold junction temperature
+    counts = low >> 4
+    if counts & 0x800:
+        counts -= 0x1000
+    out.junction_counts = counts
+    out.fault = bool(high & 0b1)
+    out.faults = low & 0b111
+    return out
+
+
+class Max31855Reader:
+    def __init__(self, spi, chip_select):
+        self.spi = spi
+        self.chip_select = chip_select
+        self._buf = bytearray(4)
+        self._view = memoryview(self._buf)
+
+    def read_into(self, out: Max31855Reading) -> Max31855Reading:
+        """
+        Reads one frame into the preallocated buffer and decodes it into out.
+        """
+        self.chip_select.off()
+        try:
+            self.spi.readinto(self._view)
+        finally:
+            self.chip_select.on()
+        return decode_frame(self._buf, out)
@@ -7,6 +7,7 @@ servers for MicroPython and standard Python.
 """
 import asyncio
 import io
+import os
 import re
 import time
 
@@ -530,6 +531,57 @@ class Request:
         return line
 
 
+class _WriteBuffer:
+    """A bounded buffer that coalesces small writes to a stream.
+
+    Buffers are pooled so that consecutive responses reuse the same memory.
+    """
+    _pool = []
+    pool_size = 2
+
+    def __init__(self, size):
+        self.data = bytearray(size)
+        self.view = memoryview(self.data)
+        self.length = 0
+        self.stream = None
+
+    @classmethod
+    def acquire(cls, stream, size):
+        buffer = None
+        while cls._pool and buffer is None:
+            buffer = cls._pool.pop()
+            if len(buffer.data) != size:  # pragma: no cover
+                buffer = None  # write_buffer_size was changed
+        if buffer is None:
+            buffer = cls(size)
+        buffer.stream = stream
+        buffer.length = 0
+        return buffer
+
+    def release(self):
+        self.stream = None
+        if len(self._pool) < self.pool_size:
+            self._pool.append(self)
+
+    async def write(self, data):
+        end = self.length + len(data)
+        if end >= len(self.data):
+            await self.flush()
+            end = len(data)
+        if end >= len(self.data):
+            # too large to be worth copying
+            await self.stream.awrite(data)
+        else:
+            self.view[self.length:end] = data
+            self.length = end
+
+    async def flush(self):
+        if self.length:
+            length = self.length
+            self.length = 0
+            await self.stream.awrite(self.view[:length])
+
+
 class Response:
     """An HTTP response class.
 
@@ -558,6 +610,15 @@ class Response:
 
     send_file_buffer_size = 1024
 
+    #: Size of the buffer that collects the status line, headers and small
+    #: body chunks of a response before they are written to the socket.
+    #: Larger chunks bypass the buffer.
+    write_buffer_size = 1024
+
+    #: The HTTP version used in the status line. Set to ``'1.1'`` by the
+    #: server when the request was made with HTTP/1.1.
+    http_version = '1.0'
+
     #: The content type to use for responses that do not explicitly define a
     #: ``Content-Type`` header.
     default_content_type = 'text/plain'
@@ -641,7 +702,8 @@ class Response:
         if isinstance(self.body, bytes) and \
                 'Content-Length' not in self.headers:
             self.headers['Content-Length'] = str(len(self.body))
-        if 'Content-Type' not in self.headers:
+        # a 304 describes the representation the client already has
+        if 'Content-Type' not in self.headers and self.status_code != 304:
             self.headers['Content-Type'] = self.default_content_type
             if 'charset=' not in self.headers['Content-Type']:
                 self.headers['Content-Type'] += '; charset=UTF-8'
@@ -649,29 +711,34 @@ class Response:
     async def write(self, stream):
         self.complete()
 
+        buffer = _WriteBuffer.acquire(stream, self.write_buffer_size)
         try:
-            # status code
+            # status line and headers are assembled in the write buffer and
+            # leave in a single write, together with a small body
             reason = self.reason if self.reason is not None else \
                 ('OK' if self.status_code == 200 else 'N/A')
-            await stream.awrite('HTTP/1.0 {status_code} {reason}\r\n'.format(
-                status_code=self.status_code, reason=reason).encode())
-
-            # headers
+            await buffer.write('HTTP/{version} {status_code} {reason}\r\n'.format(
+                version=self.http_version, status_code=self.status_code,
+                reason=reason).encode())
             for header, value in self.headers.items():
                 values = value if isinstance(value, list) else [value]
                 for value in values:
-                    await stream.awrite('{header}: {value}\r\n'.format(
+                    await buffer.write('{header}: {value}\r\n'.format(
                         header=header, value=value).encode())
-            await stream.awrite(b'\r\n')
+            await buffer.write(b'\r\n')
 
             # body
             if not self.is_head:
+                # streamed bodies go out as they are produced
+                streaming = hasattr(self.body, '__anext__')
                 iter = self.body_iter()
                 async for body in iter:
                     if isinstance(body, str):  # pragma: no cover
                         body = body.encode()
                     try:
-                        await stream.awrite(body)
+                        await buffer.write(body)
+                        if streaming:
+                            await buffer.flush()
                     except OSError as exc:  # pragma: no cover
                         if exc.errno in MUTED_SOCKET_ERRORS or \
                                 exc.args[0] == 'Connection lost':
@@ -680,6 +747,7 @@ class Response:
                         raise
                 if hasattr(iter, 'aclose'):  # pragma: no branch
                     await iter.aclose()
+            await buffer.flush()
 
         except OSError as exc:  # pragma: no cover
             if exc.errno in MUTED_SOCKET_ERRORS or \
@@ -687,6 +755,8 @@ class Response:
                 pass
             else:
                 raise
+        finally:
+            buffer.release()
 
     def body_iter(self):
         if hasattr(self.body, '__anext__'):
@@ -809,6 +879,10 @@ class Response:
             headers['Content-Encoding'] = compressed \
                 if isinstance(compressed, str) else 'gzip'
 
+        if stream is None:
+            # a known length lets the connection be kept alive
+            headers['Content-Length'] = str(
+                os.stat(filename + file_extension)[6])
         f = stream or open(filename + file_extension, 'rb')
         return cls(body=f, status_code=status_code, headers=headers)
 
@@ -905,6 +979,13 @@ class Microdot:
 
         app = Microdot()
     """
+    #: Seconds an idle persistent connection is kept open waiting for the
+    #: next request.
+    keep_alive_timeout = 5
+
+    #: Maximum number of requests served on one connection. Set to 0 to close
+    #: the connection after every response.
+    keep_alive_max_requests = 20
 
     def __init__(self):
         self.url_map = []
@@ -1332,27 +1413,80 @@ class Microdot:
         return {'Allow': ', '.join(allow)}
 
     async def handle_request(self, reader, writer):
-        req = None
-        try:
-            req = await Request.create(self, reader, writer,
-                                       writer.get_extra_info('peername'))
-        except Exception as exc:  # pragma: no cover
-            print_exception(exc)
+        served = 0
+        keep_alive = True
+        while keep_alive:
+            req = None
+            try:
+                if served:
+                    # wait for the next request on a persistent connection
+                    req = await asyncio.wait_for(
+                        Request.create(self, reader, writer,
+                                       writer.get_extra_info('peername')),
+                        self.keep_alive_timeout)
+                else:
+                    req = await Request.create(
+                        self, reader, writer,
+                        writer.get_extra_info('peername'))
+            except asyncio.TimeoutError:
+                break
+            except Exception as exc:  # pragma: no cover
+                print_exception(exc)
+            if served and req is None:
+                # the client closed the persistent connection
+                break
+            served += 1
 
-        res = await self.dispatch_request(req)
+            res = await self.dispatch_request(req)
+            keep_alive = res != Response.already_handled and \
+                self._keep_alive(req, res, served)
+            try:
+                if res != Response.already_handled:  # pragma: no branch
+                    await res.write(writer)
+            except OSError as exc:  # pragma: no cover
+                keep_alive = False
+                if exc.errno in MUTED_SOCKET_ERRORS:
+                    pass
+                else:
+                    raise
+            if self.debug and req:  # pragma: no cover
+                print('{method} {path} {status_code}'.format(
+                    method=req.method, path=req.path,
+                    status_code=res.status_code))
         try:
-            if res != Response.already_handled:  # pragma: no branch
-                await res.write(writer)
             await writer.aclose()
         except OSError as exc:  # pragma: no cover
             if exc.errno in MUTED_SOCKET_ERRORS:
                 pass
             else:
                 raise
-        if self.debug and req:  # pragma: no cover
-            print('{method} {path} {status_code}'.format(
-                method=req.method, path=req.path,
-                status_code=res.status_code))
+
+    def _keep_alive(self, req, res, served):
+        """Decide if the connection stays open after this response, and set
+        the HTTP version and connection headers of the response accordingly.
+        """
+        if req is None:
+            return False
+        connection = req.headers.get('Connection', '').lower()
+        if req.http_version == '1.1':
+            res.http_version = '1.1'
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+        res.complete()
+        keep_alive = keep_alive and self.keep_alive_max_requests > 0 and \
+            served < self.keep_alive_max_requests and \
+            'Content-Length' in res.headers and \
+            req.content_length <= req.max_body_length and \
+            'Transfer-Encoding' not in req.headers
+        if keep_alive:
+            res.headers['Connection'] = 'keep-alive'
+            res.headers['Keep-Alive'] = 'timeout={}, max={}'.format(
+                self.keep_alive_timeout,
+                self.keep_alive_max_requests - served)
+        else:
+            res.headers['Connection'] = 'close'
+        return keep_alive
 
     def get_request_handlers(self, req, attr, local_first=True):
         handlers = getattr(self, attr + '_handlers')
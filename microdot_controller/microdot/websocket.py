@@ -5,6 +5,12 @@ from microdot.microdot import MUTED_SOCKET_ERRORS, print_exception
 from microdot.helpers import wraps
 
 
+def _unmask(payload, mask):
+    """XOR payload with the 4 byte client mask, in place."""
+    for i in range(len(payload)):
+        payload[i] ^= mask[i & 3]
+
+
 class WebSocketError(Exception):
     """Exception raised when an error occurs in a WebSocket connection."""
     pass
@@ -35,9 +41,19 @@ class WebSocket:
     #:    WebSocket.max_message_length = 4 * 1024  # up to 4KB messages
     max_message_length = -1
 
+    #: Payloads up to this size are copied next to the frame header in a
+    #: buffer kept by the connection. Larger payloads get a frame allocated
+    #: for them. Either way each frame goes out in a single write.
+    send_buffer_size = 128
+
     def __init__(self, request):
         self.request = request
         self.closed = False
+        # header (up to 10 bytes) plus a small payload
+        self._send_buffer = bytearray(10 + self.send_buffer_size)
+        # grows to the largest message received on this connection
+        self._receive_buffer = bytearray(0)
+        self._frame_header = bytearray(8)
 
     async def handshake(self):
         response = self._handshake_response()
@@ -66,9 +82,41 @@ class WebSocket:
                        is ``TEXT`` or ``BINARY`` depending on the type of the
                        data.
         """
-        frame = self._encode_websocket_frame(
-            opcode or (self.TEXT if isinstance(data, str) else self.BINARY),
+        opcode = opcode or (self.TEXT if isinstance(data, str) else
+                            self.BINARY)
+        if isinstance(data, str):
+            data = data.encode()
+        buffer = memoryview(self._send_buffer)
+        offset = self._write_frame_header(buffer, opcode, len(data))
+        end = offset + len(data)
+        if end <= len(buffer):
+            buffer[offset:end] = data
+            await self.request.sock[1].awrite(buffer[:end])
+        else:
+            # one write per frame, so that frames sent by other tasks on this
+            # connection (broadcasts) cannot land between header and payload
+            frame = bytearray(end)
+            frame[:offset] = buffer[:offset]
+            frame[offset:] = data
+            await self.request.sock[1].awrite(frame)
+
+    @classmethod
+    def encode(cls, data, opcode=None):
+        """Encode a message as a frame that can be given to ``send_frame()``.
+
+        This allows a message that goes to many clients to be encoded once.
+
+        :param data: the data to encode, given as a string or bytes.
+        :param opcode: a custom frame opcode to use. If not given, the opcode
+                       is ``TEXT`` or ``BINARY`` depending on the type of the
+                       data.
+        """
+        return cls._encode_websocket_frame(
+            opcode or (cls.TEXT if isinstance(data, str) else cls.BINARY),
             data)
+
+    async def send_frame(self, frame):
+        """Send a frame previously encoded with ``encode()``."""
         await self.request.sock[1].awrite(frame)
 
     async def close(self):
@@ -114,55 +162,87 @@ class WebSocket:
         return fin, opcode, has_mask, length
 
     def _process_websocket_frame(self, opcode, payload):
+        # payload is a view of the receive buffer, which the next frame
+        # overwrites, so messages are returned as copies
         if opcode == self.TEXT:
-            payload = payload.decode()
+            payload = str(payload, 'utf-8')
         elif opcode == self.BINARY:
-            pass
+            payload = bytes(payload)
         elif opcode == self.CLOSE:
             raise WebSocketError('Websocket connection closed')
         elif opcode == self.PING:
-            return self.PONG, payload
+            return self.PONG, bytes(payload)
         elif opcode == self.PONG:  # pragma: no branch
             return None, None
         return None, payload
 
+    @staticmethod
+    def _write_frame_header(buffer, opcode, length):
+        """Write a frame header at the start of buffer and return its size."""
+        buffer[0] = 0x80 | opcode
+        if length < 126:
+            buffer[1] = length
+            return 2
+        if length < (1 << 16):
+            buffer[1] = 126
+            buffer[2] = length >> 8
+            buffer[3] = length & 0xff
+            return 4
+        buffer[1] = 127
+        for i in range(8):
+            buffer[9 - i] = (length >> (8 * i)) & 0xff
+        return 10
+
     @classmethod
     def _encode_websocket_frame(cls, opcode, payload):
-        frame = bytearray()
-        frame.append(0x80 | opcode)
         if opcode == cls.TEXT:
             payload = payload.encode()
-        if len(payload) < 126:
-            frame.append(len(payload))
-        elif len(payload) < (1 << 16):
-            frame.append(126)
-            frame.extend(len(payload).to_bytes(2, 'big'))
-        else:
-            frame.append(127)
-            frame.extend(len(payload).to_bytes(8, 'big'))
-        frame.extend(payload)
+        length = len(payload)
+        size = 2 if length < 126 else 4 if length < (1 << 16) else 10
+        # allocated once at its final size and filled through a memoryview
+        frame = bytearray(size + length)
+        view = memoryview(frame)
+        cls._write_frame_header(view, opcode, length)
+        view[size:] = payload
         return frame
 
+    async def _read_exactly(self, view):
+        """Fill view from the socket."""
+        reader = self.request.sock[0]
+        if not hasattr(reader, 'readinto'):  # pragma: no cover
+            # CPython streams
+            view[:] = await reader.readexactly(len(view))
+            return
+        received = 0
+        while received < len(view):
+            n = await reader.readinto(view[received:])
+            if not n:  # pragma: no cover
+                raise WebSocketError('Websocket connection closed')
+            received += n
+
     async def _read_frame(self):
-        header = await self.request.sock[0].read(2)
-        if len(header) != 2:  # pragma: no cover
+        header = memoryview(self._frame_header)
+        try:
+            await self._read_exactly(header[:2])
+        except EOFError:  # pragma: no cover
             raise WebSocketError('Websocket connection closed')
         fin, opcode, has_mask, length = self._parse_frame_header(header)
-        if length == -2:
-            length = await self.request.sock[0].read(2)
-            length = int.from_bytes(length, 'big')
-        elif length == -8:
-            length = await self.request.sock[0].read(8)
-            length = int.from_bytes(length, 'big')
+        if length < 0:
+            await self._read_exactly(header[:-length])
+            length = int.from_bytes(header[:-length], 'big')
         max_allowed_length = Request.max_body_length \
             if self.max_message_length == -1 else self.max_message_length
         if length > max_allowed_length:
             raise WebSocketError('Message too large')
         if has_mask:  # pragma: no cover
-            mask = await self.request.sock[0].read(4)
-        payload = await self.request.sock[0].read(length)
+            await self._read_exactly(header[4:8])
+            mask = bytes(header[4:8])
+        if length > len(self._receive_buffer):
+            self._receive_buffer = bytearray(length)
+        payload = memoryview(self._receive_buffer)[:length]
+        await self._read_exactly(payload)
         if has_mask:  # pragma: no cover
-            payload = bytes(x ^ mask[i % 4] for i, x in enumerate(payload))
+            _unmask(payload, mask)
         return opcode, payload
 
 
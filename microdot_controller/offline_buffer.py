@@ -0,0 +1,179 @@
+import os
+import logging
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_KB = 16  # Size at which a segment file is closed and a new one started
+DEFAULT_MAX_KB = 1024
+DEFAULT_MAX_DISK_FRACTION = 0.5  # Never use more than this share of the free flash
+
+_SEGMENT_SUFFIX = ".buf"
+_SCAN_CHUNK = 512  # Bytes read at a time when counting the points of a segment
+
+
+class OfflineBuffer:
+    """
+    Flash-backed FIFO of line protocol points, used to keep telemetry while the
+    InfluxDB endpoint is unreachable.
+
+    Points are stored one per line, at their own length, in append-only segment
+    files. A segment is never rewritten: new points go to the newest segment,
+    replay reads from the oldest one, which is deleted once fully sent, and when
+    the flash budget is used up the oldest segment is deleted to make room. The
+    read position is only kept in RAM, so after a reboot the oldest segment is
+    replayed again from its start; InfluxDB overwrites points with identical
+    series and timestamp, so this only costs bandwidth.
+    """
+
+    def __init__(
+        self,
+        directory,
+        segment_kb=DEFAULT_SEGMENT_KB,
+        max_kb=DEFAULT_MAX_KB,
+        max_disk_fraction=DEFAULT_MAX_DISK_FRACTION,
+        disk_status=None,
+    ):
+        if disk_status is None:
+            from device_status import get_disk_status
+            disk_status = get_disk_status
+        self.directory = directory
+        self.segment_size = segment_kb * 1024
+        self.spilled = 0
+        self.replayed = 0
+        self.discarded = 0
+        self._read_count = 0  # Points of the oldest segment already replayed
+        self._read_offset = 0  # ... and their size in bytes
+        self._read_sizes = []  # Sizes of the points returned by the last read()
+        try:
+            os.mkdir(directory)
+        except OSError:
+            pass  # Already exists
+        self._segments = sorted(
+            int(name[:-len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(directory) if name.endswith(_SEGMENT_SUFFIX)
+        )
+        self._counts = []  # Complete points in each segment
+        self._tail_size = None  # Bytes in the newest segment, None when it takes no more points
+        used = 0
+        for seq in self._segments:
+            count, size, complete = self._scan(seq)
+            self._counts.append(count)
+            used += size
+            # A partially written trailing point (power loss) is ignored, and
+            # nothing is appended after it
+            self._tail_size = size if complete else None
+        self._pending = sum(self._counts)
+        status = disk_status()
+        free_kb = status["diskTotal"] - status["diskUsed"] + used / 1024
+        budget_kb = min(max_kb, free_kb * max_disk_fraction)
+        self.max_segments = max(1, int(budget_kb * 1024) // self.segment_size)
+        log.info("Offline buffer at %s: %d points pending, up to %d segments of %d bytes",
+                 directory, self._pending, self.max_segments, self.segment_size)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def get_stats(self) -> dict:
+        return {
+            "offline_pending": self._pending,
+            "offline_spilled": self.spilled,
+            "offline_replayed": self.replayed,
+            "offline_discarded": self.discarded,
+        }
+
+    def _path(self, seq) -> str:
+        return "%s/%08d%s" % (self.directory, seq, _SEGMENT_SUFFIX)
+
+    def _scan(self, seq):
+        """
+        Returns the number of complete points in a segment, its size, and whether
+        it ends with a complete point.
+        """
+        count = size = 0
+        last = b"\n"
+        with open(self._path(seq), "rb") as f:
+            while True:
+                chunk = f.read(_SCAN_CHUNK)
+                if not chunk:
+                    break
+                count += chunk.count(b"\n")
+                size += len(chunk)
+                last = chunk[-1:]
+        return count, size, last == b"\n"
+
+    def _drop_oldest_segment(self):
+        seq = self._segments.pop(0)
+        lost = self._counts.pop(0) - self._read_count
+        os.remove(self._path(seq))
+        self._read_count = self._read_offset = 0
+        self._read_sizes = []
+        self._pending -= lost
+        return lost
+
+    def append(self, lines) -> int:
+        """
+        Stores the given points, oldest first. Returns how many were stored.
+        """
+        stored = 0
+        index = 0
+        while index < len(lines):
+            if self._tail_size is None or self._tail_size >= self.segment_size:
+                # Open a new segment, making room for it if needed
+                if len(self._segments) >= self.max_segments:
+                    self.discarded += self._drop_oldest_segment()
+                self._segments.append(self._segments[-1] + 1 if self._segments else 1)
+                self._counts.append(0)
+                self._tail_size = 0
+            with open(self._path(self._segments[-1]), "ab") as f:
+                while index < len(lines) and self._tail_size < self.segment_size:
+                    record = lines[index].encode() + b"\n"
+                    index += 1
+                    f.write(record)
+                    self._tail_size += len(record)
+                    self._counts[-1] += 1
+                    stored += 1
+        self._pending += stored
+        self.spilled += stored
+        return stored
+
+    def read(self, count) -> list:
+        """
+        Returns up to count of the oldest points without removing them.
+        Call consume() once they have been sent.
+        """
+        if not self._segments:
+            return []
+        count = min(count, self._counts[0] - self._read_count)
+        if count <= 0:
+            return []
+        lines = []
+        sizes = []
+        with open(self._path(self._segments[0]), "rb") as f:
+            f.seek(self._read_offset)
+            for _ in range(count):
+                line = f.readline()
+                lines.append(line[:-1].decode())
+                sizes.append(len(line))
+        self._read_sizes = sizes
+        return lines
+
+    def consume(self, count):
+        """
+        Forgets the count oldest points returned by the last read(), deleting the
+        segment once it is fully read.
+        """
+        if not self._segments:
+            return
+        self._read_count += count
+        self._read_offset += sum(self._read_sizes[:count])
+        self._read_sizes = []
+        self._pending -= count
+        self.replayed += count
+        if self._read_count >= self._counts[0] and (
+                len(self._segments) > 1 or self._tail_size is None or self._tail_size >= self.segment_size):
+            os.remove(self._path(self._segments.pop(0)))
+            self._counts.pop(0)
+            self._read_count = self._read_offset = 0
+            if not self._segments:
+                self._tail_size = None
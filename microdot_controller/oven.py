@@ -1,16 +1,15 @@
 import asyncio
 import time
 import random
-import datetime
 import logging
 import json
 import config
 from pid_config import pid_config
 from max31855 import MAX31855, MAX31855Error
-from timezone import BRT_TZ
-from device_status import get_board_temperature, get_disk_status, get_memory_status
+from device_status import DeviceStatusSampler
 from ring_buffer import RingBuffer
 from influxdb import InfluxDB
+from scheduler import Scheduler
 
 DEFAULT_BACKLOG_UNDERSAMPLING_FACTOR = 20  # Default value for the backlog undersampling factor
 
@@ -24,7 +23,7 @@ pwm_heat.freq(65)
 pwm_heat.duty(0)  # Set initial duty cycle to 0
 
 def set_heat_duty(value: float):
-    log.info("Setting heat duty to %.2f" % value)
+    log.info("Setting heat duty to %.2f", value)
     value*=1023
     if value < 0:
         value = 0
@@ -41,22 +40,32 @@ class Oven:
         time_step=config.sensor_time_wait,
         temperature_oversamples=config.temperature_oversamples,
         temperature_averaging_window=config.temperature_averaging_window,
-        sensor_retry_attempts=config.sensor_retry_attempts
+        sensor_retry_attempts=config.sensor_retry_attempts,
+        device_status_interval=config.device_status_interval,
+        control_phase_offset=config.control_phase_offset,
     ):
         self.time_step = time_step
+        # PID ticks land control_phase_offset after a sensor sample (see scheduler.py)
+        self.tick = Scheduler().every("oven", time_step, phase=control_phase_offset)
         self.reset()
         self.runtime = 0
         self.backlog_undersampling_factor = DEFAULT_BACKLOG_UNDERSAMPLING_FACTOR
 
+        # Gains edited through /parameters reach the running PID without a reset()
+        pid_config.add_listener(self._on_pid_config_changed)
+
         self.temp_sensor = TempSensorReal(
             self.time_step,
             temperature_oversamples=temperature_oversamples,
             temperature_averaging_window=temperature_averaging_window,
             sensor_retry_attempts=sensor_retry_attempts
         )
-        # Start tasks for the sensor and oven loop
+        # First sampled by its task; until then get_state() has no device fields
+        self.device_status = DeviceStatusSampler(device_status_interval)
+        # Start tasks for the sensor, oven loop and device status sampler
         asyncio.create_task(self.temp_sensor.run())
         asyncio.create_task(self.run())
+        asyncio.create_task(self.device_status.run())
 
     @property
     def heat(self):
@@ -68,7 +77,7 @@ class Oven:
 
     def reset(self):
         self.profile = None
-        self.start_time = datetime.datetime.now(BRT_TZ)
+        self._set_start_time()
         self.runtime = 0
         self.totaltime = 0
         self.target = 0
@@ -76,15 +85,46 @@ class Oven:
         self.heat = 0.0
         self.cool = 0.0
         self.air = 0.0
-        self.pid = PID(ki=pid_config.pid_ki, kd=pid_config.pid_kd, kp=pid_config.pid_kp)
+        self.pid = PID(ki=pid_config.pid_ki, kd=pid_config.pid_kd, kp=pid_config.pid_kp,
+                       max_dt=10 * self.time_step)
         self.backlog_undersampling_factor = DEFAULT_BACKLOG_UNDERSAMPLING_FACTOR
 
+    def _set_start_time(self):
+        # runtime is measured on the monotonic tick counter, which NTP resyncs do not move
+        # (ticks_diff is exact for runs shorter than ~6 days). The wall clock start is only
+        # kept for display and telemetry tags.
+        self.start_ticks = time.ticks_ms()
+        self.start_epoch = time.time()
+        self._start_time = None
+        self._start_time_iso = None
+
+    @property
+    def start_time(self):
+        # Built on first use, so datetime.py is not loaded before something displays it
+        if self._start_time is None:
+            import datetime
+            from timezone import BRT_TZ
+            self._start_time = datetime.datetime.fromtimestamp(self.start_epoch, BRT_TZ)
+        return self._start_time
+
+    @property
+    def start_time_iso(self):
+        if self._start_time_iso is None:
+            self._start_time_iso = self.start_time.isoformat()
+        return self._start_time_iso
+
+    def _on_pid_config_changed(self, gains):
+        log.info("PID parameters changed: %s", gains)
+        self.pid.set_gains(ki=gains.get("ki"), kd=gains.get("kd"), kp=gains.get("kp"))
+
     def run_profile(self, profile, backlog_undersampling_factor):
-        log.info("Running profile %s" % profile.name)
+        log.info("Running profile %s", profile.name)
         self.profile = profile
         self.totaltime = profile.get_duration()
         self.state = Oven.STATE_RUNNING
-        self.start_time = datetime.datetime.now(BRT_TZ)
+        self._set_start_time()
+        # The PID may have been idle for hours: start from a clean integral and clock
+        self.pid.reset()
         self.backlog_undersampling_factor = backlog_undersampling_factor
         log.info("Starting")
 
@@ -96,17 +136,17 @@ class Oven:
         last_temp = 0
         pid_value = 0
         while True:
+            await self.tick.wait()
             if self.state == Oven.STATE_RUNNING:
-                runtime_delta = (datetime.datetime.now(BRT_TZ) - self.start_time).total_seconds()
-                self.runtime = runtime_delta
-                log.info("running at %.1f deg C (Target: %.1f), heat %.2f, cool %.2f, air %.2f (%.1fs/%.0f)" %
-                         (self.temp_sensor.temperature, self.target, self.heat, self.cool, self.air, self.runtime, self.totaltime))
-                log.debug(f" >>> Profile <<<  {self.profile}")
-                log.debug(f" >>> Runtime <<<  {self.runtime}")
+                self.runtime = time.ticks_diff(time.ticks_ms(), self.start_ticks) / 1000
+                log.info("running at %.1f deg C (Target: %.1f), heat %.2f, cool %.2f, air %.2f (%.1fs/%.0f)",
+                         self.temp_sensor.temperature, self.target, self.heat, self.cool, self.air, self.runtime, self.totaltime)
+                log.debug(" >>> Profile <<<  %s", self.profile)
+                log.debug(" >>> Runtime <<<  %s", self.runtime)
                 self.target = self.profile.get_target_temperature(self.runtime) if self.profile else 0
                 pid_value = self.pid.compute(self.target, self.temp_sensor.temperature)
 
-                log.info("pid: %.3f" % pid_value)
+                log.info("pid: %.3f", pid_value)
 
                 if pid_value > 0:
                     if last_temp == self.temp_sensor.temperature:
@@ -123,17 +163,18 @@ class Oven:
 
                 self.heat = pid_value
 
-                log.debug(f"+++ Debug_times +++ runtime: {self.runtime}, totaltime: {self.totaltime}")
+                log.debug("+++ Debug_times +++ runtime: %s, totaltime: %s", self.runtime, self.totaltime)
                 if self.runtime >= self.totaltime and self.totaltime > 0:
                     log.info("Profile finished, resetting oven")
                     self.reset()
 
-            await asyncio.sleep(self.time_step)
-
     def get_state(self):
         oven_state = {
             'runtime': self.runtime,
             'temperature': self.temp_sensor.temperature,
+            'temperatureStddev': self.temp_sensor.temperature_stddev,
+            'temperatureMin': self.temp_sensor.temperature_min,
+            'temperatureMax': self.temp_sensor.temperature_max,
             'target': self.target,
             'state': self.state,
             'heat': self.heat,
@@ -141,9 +182,9 @@ class Oven:
             'air': self.air,
             'totaltime': self.totaltime,
         }
-        oven_state["boardTemperature"] = get_board_temperature()
-        oven_state.update(get_disk_status())
-        oven_state.update(get_memory_status())
+        # Sampled by DeviceStatusSampler; deviceStatusAge tells how stale it is
+        oven_state.update(self.device_status.snapshot)
+        oven_state["deviceStatusAge"] = self.device_status.age()
         pid_state = self.pid.state.to_dict() if (self.pid and self.pid.state) else {}
         oven_state.update(pid_state)
         return oven_state
@@ -158,6 +199,10 @@ class TempSensorReal:
         sensor_retry_attempts,
     ):
         self.temperature = 0
+        # Spread of the readings inside the averaging window
+        self.temperature_stddev = 0
+        self.temperature_min = 0
+        self.temperature_max = 0
         self.time_step = time_step
         self.temperature_oversamples = temperature_oversamples
         self.temperature_averaging_window = temperature_averaging_window
@@ -168,20 +213,27 @@ class TempSensorReal:
             config.gpio_sensor_data,
             config.gpio_thermocouple_vdd,
             config.gpio_thermocouple_gnd,
-            config.temp_scale
+            config.temp_scale,
+            cold_junction_table=config.thermocouple_cold_junction_table,
+            spi_id=config.thermocouple_spi_id
         )
         self.ring_buffer = RingBuffer(self.temperature_averaging_window)
         self.influxdb = InfluxDB()
+        self.tick = Scheduler().every("sensor", time_step / temperature_oversamples)
 
     async def run(self):
         while True:
+            await self.tick.wait()
             for attempt in range(self.sensor_retry_attempts):
                 try:
                     self.ring_buffer.add(self.thermocouple.get())
                     self.temperature = self.ring_buffer.average()
+                    self.temperature_stddev = self.ring_buffer.stddev()
+                    self.temperature_min = self.ring_buffer.min()
+                    self.temperature_max = self.ring_buffer.max()
                     break  # Exit the retry loop if successful
                 except Exception as e:
-                    log.warning(f"Attempt {attempt + 1} failed to read temperature: {e}")
+                    log.warning("Attempt %d failed to read temperature: %s", attempt + 1, e)
                     if attempt == config.sensor_retry_attempts - 1:
                         log.exception("Giving up on reading temperature after multiple attempts", exc_info=e)
                 if attempt == self.sensor_retry_attempts - 1:
@@ -189,49 +241,86 @@ class TempSensorReal:
                         {"temperature_read_error": 1},
                         {"retry_attempts": self.sensor_retry_attempts},
                     )
-            await asyncio.sleep(self.time_step / self.temperature_oversamples)
+
+def _bisect_right(values, x, lo=0):
+    # MicroPython has no bisect module; returns the first index with values[i] > x.
+    hi = len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if x < values[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
 
 class Profile:
     def __init__(self, json_data):
         obj = json.loads(json_data)
         self.name = obj["name"]
         self.data = sorted(obj["data"])
+        # Lookup index: segment i goes from point i-1 to point i, slopes[i] is its inclination.
+        self._times = [t for (t, x) in self.data]
+        self._temps = [x for (t, x) in self.data]
+        self._duration = max(self._times)
+        self._slopes = [0.0] * len(self.data)
+        for i in range(len(self.data)):
+            (prev_t, prev_x) = self.data[i-1]
+            (next_t, next_x) = self.data[i]
+            if next_t != prev_t:
+                self._slopes[i] = float(next_x - prev_x) / float(next_t - prev_t)
+        self._cursor = 0
 
     def get_duration(self):
-        return max([t for (t, x) in self.data])
+        return self._duration
+
+    def _segment_index(self, time_val):
+        """
+        Returns the index of the first point strictly after time_val, or None past the end.
+        Runtimes grow monotonically, so the segment used on the last lookup (or the one
+        right after it) is checked before falling back to a bisection.
+        """
+        if time_val > self._duration:
+            return None
+        times = self._times
+        i = self._cursor
+        n = len(times)
+        if 0 < i < n and times[i-1] <= time_val:
+            if time_val < times[i]:
+                return i
+            if i + 1 < n and time_val < times[i+1]:
+                self._cursor = i + 1
+                return i + 1
+        i = _bisect_right(times, time_val)
+        if i >= n:
+            return None
+        self._cursor = i
+        return i
 
     def get_surrounding_points(self, time_val):
-        if time_val > self.get_duration():
+        i = self._segment_index(time_val)
+        if i is None:
             return (None, None)
-        prev_point = None
-        next_point = None
-        for i in range(len(self.data)):
-            if time_val < self.data[i][0]:
-                prev_point = self.data[i-1]
-                next_point = self.data[i]
-                break
-        return (prev_point, next_point)
+        return (self.data[i-1], self.data[i])
 
     def is_rising(self, time_val):
-        (prev_point, next_point) = self.get_surrounding_points(time_val)
-        if prev_point and next_point:
-            return prev_point[1] < next_point[1]
-        else:
+        i = self._segment_index(time_val)
+        if i is None:
             return False
+        return self._temps[i-1] < self._temps[i]
 
     def get_target_temperature(self, time_val):
-        log.debug(f"=== entering get_target_temperature with time_val: {time_val} ===")
-        if time_val > self.get_duration():
-            return 0
-        (prev_point, next_point) = self.get_surrounding_points(time_val)
-        if (prev_point is None) and (next_point is None):
+        i = self._segment_index(time_val)
+        if i is None:
             log.debug("No surrounding points found, returning 0")
             return 0
-        incl = float(next_point[1] - prev_point[1]) / float(next_point[0] - prev_point[0])
-        temp = prev_point[1] + (time_val - prev_point[0]) * incl
-        return temp
+        return self._temps[i-1] + (time_val - self._times[i-1]) * self._slopes[i]
 
 class PIDState:
+    __slots__ = (
+        "kp", "kd", "ki", "err", "dErr", "iErr", "pTerm", "dTerm", "iTerm", "raw_out", "bounded_out"
+    )
+
     def __init__(self, kp, kd, ki, err, dErr, iErr, pTerm, dTerm, iTerm, raw_out, bounded_out):
         self.kp = kp
         self.kd = kd
@@ -260,41 +349,71 @@ class PIDState:
             'bounded_out': self.bounded_out
         }
 class PID:
-    def __init__(self, ki=1, kp=1, kd=1):
+    def __init__(self, ki=1, kp=1, kd=1, max_dt=None):
         self.ki = ki
         self.kp = kp
         self.kd = kd
-        self.lastNow = datetime.datetime.now(BRT_TZ)
+        # Longest time step (seconds) one compute() may account for, so a late or
+        # first call after a pause cannot wind up the integral
+        self.max_dt = max_dt
+        self.state: PIDState = None
+        self.reset()
+
+    def reset(self):
+        self.lastNow = time.ticks_ms()
         self.iterm = 0
         self.lastErr = 0
         self._iErr = 0
-        self.state: PIDState = None
+
+    def set_gains(self, ki, kd, kp):
+        self.ki = ki
+        self.kd = kd
+        self.kp = kp
 
     def compute(self, setpoint, ispoint):
-        now = datetime.datetime.now(BRT_TZ)
-        timeDelta = (now - self.lastNow).total_seconds()
+        # Runs every control tick: no lists, no datetime objects and a single PIDState
+        # updated in place, so the loop allocates far less. Float results are still
+        # boxed on the ESP32 port, so each call allocates a few small objects
+        # (benchmarks/bench_pid.py reports how many bytes).
+        now = time.ticks_ms()
+        timeDelta = time.ticks_diff(now, self.lastNow) / 1000
+        if timeDelta < 0:
+            timeDelta = 0  # ticks_ms wrapped around (over ~6 days since the last call)
+        elif self.max_dt is not None and timeDelta > self.max_dt:
+            timeDelta = self.max_dt
         error = float(setpoint - ispoint)
-        self.iterm += (error * timeDelta * self.ki)
-        self.iterm = sorted([-1, self.iterm, 1])[1]
+        iterm = self.iterm + error * timeDelta * self.ki
+        if iterm > 1:
+            iterm = 1
+        elif iterm < -1:
+            iterm = -1
+        self.iterm = iterm
         self._iErr += error * timeDelta
-        dErr = (error - self.lastErr) / timeDelta
+        dErr = (error - self.lastErr) / timeDelta if timeDelta > 0 else 0.0
         pTerm = self.kp * error
         dTerm = self.kd * dErr
-        output = pTerm + self.iterm + dTerm
-        output = sorted([-1, output, 1])[1]
+        raw_out = pTerm + iterm + dTerm
+        if raw_out > 1:
+            output = 1
+        elif raw_out < -1:
+            output = -1
+        else:
+            output = raw_out
         self.lastErr = error
         self.lastNow = now
-        self.state = PIDState(
-            kp=self.kp,
-            kd=self.kd,
-            ki=self.ki,
-            err=error,
-            dErr=dErr,
-            iErr=self._iErr,
-            pTerm=pTerm,
-            dTerm=dTerm,
-            iTerm=self.iterm,
-            raw_out=self.kp * error + self._iErr * self.ki + self.kd * dErr,
-            bounded_out=output
-        )
+
+        state = self.state
+        if state is None:
+            state = self.state = PIDState(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        state.kp = self.kp
+        state.kd = self.kd
+        state.ki = self.ki
+        state.err = error
+        state.dErr = dErr
+        state.iErr = self._iErr
+        state.pTerm = pTerm
+        state.dTerm = dTerm
+        state.iTerm = iterm
+        state.raw_out = self.kp * error + self._iErr * self.ki + self.kd * dErr
+        state.bounded_out = output
         return output
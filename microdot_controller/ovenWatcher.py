@@ -5,6 +5,22 @@ from timezone import BRT_TZ
 from influxdb import InfluxDB
 import config
 from pid_config import pid_config
+from broadcaster import Broadcaster
+from backlog import Backlog
+from status_codec import StatusCodec
+from microdot.websocket import WebSocket
+from scheduler import Scheduler
+
+BACKLOG_CHUNK_SIZE = 20  # Points per backlog frame sent to new observers
+
+# Oven.get_state fields sent to binary status observers, see status_codec.py
+STATUS_FIELDS = (
+    "runtime", "temperature", "temperatureStddev", "temperatureMin", "temperatureMax",
+    "target", "state", "heat", "cool", "air", "totaltime",
+    "boardTemperature", "diskUsed", "diskTotal", "memoryUsed", "memoryTotal", "deviceStatusAge",
+    "kp", "kd", "ki", "err", "dErr", "iErr", "pTerm", "dTerm", "iTerm", "raw_out", "bounded_out",
+)
+STATUS_ENUMS = {"state": [Oven.STATE_IDLE, Oven.STATE_RUNNING]}
 
 log = logging.getLogger(__name__)
 log.info("Initializing OvenWatcher")
@@ -12,18 +28,24 @@ log.info("Initializing OvenWatcher")
 class OvenWatcher:
     def __init__(self, oven: Oven):
         self.last_profile = None
-        self.past_states = []
+        self.past_states = Backlog()
         self.started = None
         self.recording = False
-        self.observers = []
+        self.observers = Broadcaster()
+        # Observers that negotiated the binary protocol, fed with delta frames
+        self.binary_observers = Broadcaster()
+        self.status_codec = StatusCodec(STATUS_FIELDS, STATUS_ENUMS)
         self.log_skip_counter = 0
         self.influxdb = InfluxDB()
         self.oven = oven
+        # Broadcast away from the PID tick, on the same grid (see scheduler.py)
+        self.tick = Scheduler().every("watcher", oven.time_step, phase=config.watcher_phase_offset)
         # Schedule the watcher loop as an asyncio task.
         asyncio.create_task(self.run_loop())
 
     async def run_loop(self):
         while True:
+            await self.tick.wait()
             log.debug("    OvenWatcher loop running...   ")
             oven_state = self.oven.get_state()
 
@@ -34,12 +56,12 @@ class OvenWatcher:
                 "kd": pid_config.pid_kd,
                 "kiln_name": config.kiln_name,
                 "state": self.oven.state,
-                "start_time": self.oven.start_time.isoformat()
+                "start_time": self.oven.start_time_iso
             })
 
             if oven_state.get("state") == Oven.STATE_RUNNING:
                 if self.log_skip_counter == 0:
-                    self.past_states.append(oven_state)
+                    self._record_state(oven_state)
                     log.debug(">>>>> Saving state to past_states: %s", oven_state)
             else:
                 self.recording = False
@@ -47,19 +69,52 @@ class OvenWatcher:
             await self.notify_all(oven_state)
 
             self.log_skip_counter = (self.log_skip_counter + 1) % self.oven.backlog_undersampling_factor
-            await asyncio.sleep(self.oven.time_step)
 
-    async def record(self, profile):
+    def record(self, profile):
         self.last_profile = profile
-        self.past_states = []
+        self.past_states.clear()
         self.started = datetime.datetime.now(BRT_TZ).isoformat()
         self.recording = True
         # Add first state for a nice graph.
-        self.past_states.append(self.oven.get_state())
+        self._record_state(self.oven.get_state())
 
-    async def add_observer(self, observer):
+    def _record_state(self, oven_state):
+        self.past_states.append(
+            oven_state["runtime"],
+            oven_state["temperature"],
+            oven_state["target"],
+            oven_state["heat"],
+        )
+
+    async def add_observer(self, observer, binary=False):
         log.debug("OvenWatcher add_observer %s", observer)
-        # Send backlog to new observer
+        # Send backlog to new observer, one chunk at a time
+        try:
+            for frame in self._backlog_frames():
+                await observer.send_frame(frame)
+        except Exception as e:
+            log.error("Could not send backlog to new observer: %s", e)
+        if binary:
+            try:
+                await observer.send(self.status_codec.schema())
+            except Exception as e:
+                log.error("Could not send status schema to new observer: %s", e)
+            if not len(self.binary_observers):
+                # Nobody depends on the codec reference state, bring it up to date
+                self.status_codec.delta(self.oven.get_state())
+            # The key frame is queued in the same step as the subscription, so no delta can slip in between
+            self.binary_observers.subscribe(observer, first_frame=self._encode_key_frame())
+        else:
+            self.observers.subscribe(observer)
+        log.debug("OvenWatcher added observer %s, total observers: %d", observer, len(self.observers) + len(self.binary_observers))
+
+    def _backlog_frames(self):
+        """
+        Yields the backlog as websocket frames, built lazily so that only one chunk of
+        the history is serialized at a time: a header frame with the profile and the
+        number of points, then frames of up to BACKLOG_CHUNK_SIZE points. Every frame
+        is a "backlog" message, so clients that expect a single one keep working.
+        """
         if self.last_profile:
             p = {
                 "name": self.last_profile.name,
@@ -69,39 +124,44 @@ class OvenWatcher:
         else:
             p = None
 
-        backlog = {
+        total = len(self.past_states)
+        generation = self.past_states.generation
+        yield WebSocket.encode(json.dumps({
             'type': "backlog",
             'profile': p,
-            'log': self.past_states,
+            'log': [],
+            'total': total,
+            'chunk_size': BACKLOG_CHUNK_SIZE,
             # 'started': self.started  # uncomment if needed
-        }
-        backlog_json = json.dumps(backlog)
-        try:
-            await observer.send(backlog_json)
-        except Exception as e:
-            log.error("Could not send backlog to new observer: %s", e)
-        self.observers.append(observer)
-        log.debug("OvenWatcher added observer %s, total observers: %d", observer, len(self.observers))
+        }))
+        for start in range(0, total, BACKLOG_CHUNK_SIZE):
+            if self.past_states.generation != generation:
+                log.debug("Backlog changed while streaming it, stopping at %d of %d points", start, total)
+                return
+            yield WebSocket.encode(json.dumps({
+                'type': "backlog",
+                'profile': None,
+                'offset': start,
+                'log': list(self.past_states.points(start, start + BACKLOG_CHUNK_SIZE)),
+            }))
+
+    def remove_observer(self, observer):
+        self.observers.unsubscribe(observer)
+        self.binary_observers.unsubscribe(observer)
+
+    def _encode_key_frame(self):
+        return WebSocket.encode(self.status_codec.key())
 
     async def notify_all(self, message):
-        message_json = json.dumps(message)
-        # Iterate over a copy of the observers list as it may change during iteration.
-        for wsock in self.observers.copy():
-            if wsock:
-                try:
-                    await wsock.send(message_json)
-                except Exception as e:
-                    log.error("could not write to socket %s: %s", wsock, e)
-                    self.observers.remove(wsock)
-            else:
-                self.observers.remove(wsock)
+        # Encoded once for every observer; each observer's queue is drained by its own task
+        if len(self.observers):
+            self.observers.publish(WebSocket.encode(json.dumps(message)))
+        if len(self.binary_observers):
+            self.binary_observers.publish(
+                WebSocket.encode(self.status_codec.delta(message)),
+                resync=self._encode_key_frame
+            )
 
     def _write_influx(self, oven_state, tags={}):
-        async def write_influx_and_log(oven_state, tags):
-            # log.debug("Writing to InfluxDB: %s", oven_state)
-            result = await self.influxdb.async_write(fields=oven_state, tags=tags)
-            log.debug("InfluxDB write result: %s", result)
-
-        asyncio.create_task(
-            write_influx_and_log(oven_state, tags)
-        )
\ No newline at end of file
+        # Queued for the InfluxDB background writer, which batches the points
+        self.influxdb.fire_write(fields=oven_state, tags=tags)
\ No newline at end of file
@@ -1,51 +1,95 @@
 import json
+import os
 _config_file = "pid_config.json"
+_tmp_config_file = _config_file + ".tmp"
 class _PIDConfig:
+    def __init__(self):
+        self._config = None
+        self._listeners = []
+
+    def _load(self):
+        """
+        Returns the in-memory snapshot of the configuration file, reading it on first use.
+        """
+        if self._config is None:
+            try:
+                file = open(_config_file, 'r')
+            except OSError:
+                # A reset between the remove and the rename in set_config() leaves
+                # only the temporary file, which is complete at that point
+                os.rename(_tmp_config_file, _config_file)
+                file = open(_config_file, 'r')
+            with file:
+                self._config = json.load(file)
+        return self._config
+
     def get_pid_config(self):
         """
         Returns the PID configuration parameters.
         """
-        with open(_config_file, 'r') as file:
-            config = json.load(file)
-            return {
-                "ki": config.get("ki"),
-                "kd": config.get("kd"),
-                "kp": config.get("kp")
-            }
+        config = self._load()
+        return {
+            "ki": config.get("ki"),
+            "kd": config.get("kd"),
+            "kp": config.get("kp")
+        }
 
     def set_config(self,name, value):
         """
         Sets the PID configuration parameter.
+        The file is rewritten through a temporary file and a rename, so a reset in the
+        middle of the write never leaves a truncated configuration behind.
         :param name: The name of the parameter (ki, kd, kp).
         :param value: The value to set for the parameter.
         """
-        with open(_config_file, 'r') as file:
-            config = json.load(file)
-        
+        config = dict(self._load())
         if name in config:
             config[name] = value
-            with open(_config_file, 'w') as file:
+            with open(_tmp_config_file, 'w') as file:
                 json.dump(config, file)
+            try:
+                os.rename(_tmp_config_file, _config_file)
+            except OSError:
+                # FAT does not rename over an existing file
+                os.remove(_config_file)
+                os.rename(_tmp_config_file, _config_file)
+            self._config = config
+            self._notify()
+
+    def add_listener(self, callback):
+        """
+        Registers callback(pid_config_dict) to be called whenever a parameter changes.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        pid_config = self.get_pid_config()
+        for callback in self._listeners:
+            callback(pid_config)
 
     @property
     def pid_ki(self):
         """
         Returns the PID ki parameter.
         """
-        return self.get_pid_config().get("ki")
+        return self._load().get("ki")
 
     @property
     def pid_kd(self):
         """
         Returns the PID kd parameter.
         """
-        return self.get_pid_config().get("kd")
+        return self._load().get("kd")
 
     @property
     def pid_kp(self):
         """
         Returns the PID kp parameter.
         """
-        return self.get_pid_config().get("kp")
+        return self._load().get("kp")
 
 pid_config = _PIDConfig()
\ No newline at end of file
@@ -0,0 +1,155 @@
+import os
+import json
+import logging
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+def exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+class ProfileEntry:
+    def __init__(self, name, mtime, size, summary, length):
+        self.name = name
+        self.mtime = mtime
+        self.size = size
+        self.summary = summary
+        self.length = length  # Characters of the profile JSON in the cached list
+        self.offset = 0  # Where that JSON starts in the cached list
+
+
+class ProfileIndex:
+    """
+    In-memory index of the profiles stored in `path`, built on first use and kept
+    up to date by save() and delete(), one entry at a time. The serialized list sent
+    to /storage clients is kept as well; each entry only records where its profile
+    sits in that string, so the profile text is held once, and a save or delete
+    splices that one profile in or out instead of reading the directory again.
+    """
+
+    _SEPARATOR = ", "
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = None  # filename -> ProfileEntry, in list order
+        self._list_json = None
+
+    def _filepath(self, name):
+        return self.path + "/" + name + ".json"
+
+    @staticmethod
+    def _summarize(profile):
+        data = profile.get("data") or []
+        return {
+            "name": profile.get("name"),
+            "points": len(data),
+            "duration": max([t for (t, x) in data]) if data else 0,
+            "max_temperature": max([x for (t, x) in data]) if data else 0,
+        }
+
+    @staticmethod
+    def _entry(profile, stat, text):
+        return ProfileEntry(profile.get("name"), stat[8], stat[6], ProfileIndex._summarize(profile), len(text))
+
+    def _index(self):
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                profile_files = os.listdir(self.path)
+            except OSError:
+                profile_files = []
+            texts = []
+            for filename in profile_files:
+                filepath = self.path + "/" + filename
+                try:
+                    with open(filepath, 'r') as f:
+                        text = f.read()
+                    entry = self._entry(json.loads(text), os.stat(filepath), text)
+                except (OSError, ValueError) as e:
+                    log.error("Skipping unreadable profile %s: %s", filename, e)
+                    continue
+                self._entries[filename] = entry
+                texts.append(text)
+            self._list_json = "[" + self._SEPARATOR.join(texts) + "]"
+            self._update_offsets()
+            log.info("Indexed %d profiles", len(self._entries))
+        return self._entries
+
+    def _update_offsets(self):
+        offset = 1  # After the opening bracket
+        for entry in self._entries.values():
+            entry.offset = offset
+            offset += entry.length + len(self._SEPARATOR)
+
+    def _splice(self, filename, entry, text):
+        """
+        Replaces, adds (entry given) or removes (entry None) one profile in the
+        cached list.
+        """
+        entries = self._index()
+        old = entries.get(filename)
+        listed = self._list_json
+        if old is None:
+            if entry is None:
+                return
+            separator = self._SEPARATOR if entries else ""
+            self._list_json = listed[:-1] + separator + text + "]"
+            entries[filename] = entry
+        else:
+            start = old.offset
+            end = start + old.length
+            if entry is not None:
+                self._list_json = listed[:start] + text + listed[end:]
+                old.name, old.mtime, old.size = entry.name, entry.mtime, entry.size
+                old.summary, old.length = entry.summary, entry.length
+            else:
+                if len(entries) > 1:
+                    # Take the separator on the side that has one
+                    if start == 1:
+                        end += len(self._SEPARATOR)
+                    else:
+                        start -= len(self._SEPARATOR)
+                self._list_json = listed[:start] + listed[end:]
+                del entries[filename]
+        self._update_offsets()
+
+    def list_json(self) -> str:
+        """
+        Returns the JSON list of all profiles.
+        """
+        self._index()
+        return self._list_json
+
+    def save(self, profile, force=False) -> bool:
+        profile_json = json.dumps(profile)
+        filename = profile['name'] + ".json"
+        filepath = self._filepath(profile['name'])
+        log.debug("Saving profile to %s", filepath)
+        if not force and exists(filepath):
+            log.error("Could not write, %s already exists", filepath)
+            return False
+        with open(filepath, 'w+') as f:
+            f.write(profile_json)
+        log.info("Wrote %s", filepath)
+        if self._entries is not None:
+            self._splice(filename, self._entry(profile, os.stat(filepath), profile_json), profile_json)
+        return True
+
+    def delete(self, profile) -> bool:
+        filename = profile['name'] + ".json"
+        filepath = self._filepath(profile['name'])
+        try:
+            os.remove(filepath)
+        except OSError as e:
+            log.error("Could not delete %s: %s", filepath, e)
+            return False
+        if self._entries is not None:
+            self._splice(filename, None, None)
+        log.info("Deleted %s", filepath)
+        return True
@@ -1,18 +1,118 @@
+from array import array
+import math
+
+RESUM_PERIOD = 1  # Recompute the running sums from scratch every RESUM_PERIOD * size adds
+
+
+class _MonotonicQueue:
+    """
+    Fixed-capacity deque of sample numbers whose values are kept monotonic, giving
+    the window extreme in amortised O(1). `better(a, b)` is True when a should
+    evict b, i.e. a >= b for a max queue.
+    """
+
+    def __init__(self, size, better):
+        self.size = size
+        self.better = better
+        self.items = array('I', [0] * size)
+        self.head = 0
+        self.length = 0
+
+    def clear(self):
+        self.head = 0
+        self.length = 0
+
+    def push(self, seq, values):
+        size = self.size
+        value = values[seq % size]
+        # Drop queued samples that can no longer be the extreme
+        while self.length and self.better(value, values[self.items[(self.head + self.length - 1) % size] % size]):
+            self.length -= 1
+        # Expire the sample that just left the window
+        if self.length and self.items[self.head] + size <= seq:
+            self.head = (self.head + 1) % size
+            self.length -= 1
+        self.items[(self.head + self.length) % size] = seq
+        self.length += 1
+
+    def front(self):
+        return self.items[self.head]
+
+
+def _ge(a, b):
+    return a >= b
+
+
+def _le(a, b):
+    return a <= b
+
+
 class RingBuffer:
     def __init__(self, size):
         self.size = size
-        self.buffer = [0] * size
+        self.buffer = array('f', [0] * size)
         self.index = 0
         self.count = 0
+        self._seq = 0  # Number of samples added so far
+        # Sums of (x - shift) and (x - shift)^2; shifting keeps the variance accurate for large readings
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._max = _MonotonicQueue(size, _ge)
+        self._min = _MonotonicQueue(size, _le)
 
     def add(self, value):
+        if self.count == self.size:
+            old = self.buffer[self.index] - self._shift
+            self._sum -= old
+            self._sum_sq -= old * old
         self.buffer[self.index] = value
+        # Read back, so the sums match what is stored in the float32 buffer
+        new = self.buffer[self.index] - self._shift
+        self._sum += new
+        self._sum_sq += new * new
+        self._max.push(self._seq, self.buffer)
+        self._min.push(self._seq, self.buffer)
+        self._seq += 1
         self.index = (self.index + 1) % self.size
         if self.count < self.size:
             self.count += 1
+        if self._seq % (self.size * RESUM_PERIOD) == 0:
+            self._resum()
+
+    def _resum(self):
+        """
+        Recomputes the running sums around the current mean to bound float drift.
+        """
+        shift = self.average()
+        total = 0.0
+        total_sq = 0.0
+        for i in range(self.count):
+            d = self.buffer[(self.index - 1 - i) % self.size] - shift
+            total += d
+            total_sq += d * d
+        self._shift = shift
+        self._sum = total
+        self._sum_sq = total_sq
 
     def average(self):
-        return sum(self.buffer) / self.count if self.count > 0 else 0
+        return self._shift + self._sum / self.count if self.count > 0 else 0
+
+    def variance(self):
+        if self.count == 0:
+            return 0
+        mean = self._sum / self.count
+        variance = self._sum_sq / self.count - mean * mean
+        return variance if variance > 0 else 0.0
+
+    def stddev(self):
+        return math.sqrt(self.variance())
+
+    def max(self):
+        return self.buffer[self._max.front() % self.size] if self.count > 0 else 0
+
+    def min(self):
+        return self.buffer[self._min.front() % self.size] if self.count > 0 else 0
 
 # # Example usage
 # ring_buffer = RingBuffer(5)
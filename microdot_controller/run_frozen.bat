@@ -0,0 +1 @@
+mpr -d c9 -m . exec "import sys; sys.path.insert(0, '.frozen'); import main"
\ No newline at end of file
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from singleton import singleton
+from instrumentation import Instrumentation
+
+
+class PeriodicTask:
+    """
+    Deadline clock of one periodic loop. Deadlines sit on a fixed grid,
+    epoch + phase + k * period, so the time spent working does not push the
+    next run back, and loops sharing the scheduler epoch keep their relative
+    phase forever.
+
+        task = Scheduler().every("oven", 1, phase=0.05)
+        while True:
+            await task.wait()
+            ...
+    """
+
+    def __init__(self, name, period_ms, phase_ms, epoch):
+        self.name = name
+        self.period_ms = period_ms
+        self.phase_ms = phase_ms
+        self.runs = 0
+        self.overruns = 0  # Times the loop was still working when its deadline passed
+        self.skipped = 0  # Whole periods dropped to get back on the grid
+        self.lateness_ms = 0  # How late the last run started
+        self.max_lateness_ms = 0
+        self.metrics = Instrumentation().task(name)
+        # First grid point that is not in the past
+        origin = time.ticks_add(epoch, phase_ms)
+        elapsed = time.ticks_diff(time.ticks_ms(), origin)
+        periods = elapsed // period_ms + 1 if elapsed > 0 else 0
+        self.deadline = time.ticks_add(origin, periods * period_ms)
+
+    async def wait(self):
+        """
+        Sleeps until the next deadline. When the deadline already passed, runs
+        right away (after yielding once), and if one or more whole periods were
+        missed they are skipped rather than run back to back.
+        """
+        self.metrics.stop()
+        remaining = time.ticks_diff(self.deadline, time.ticks_ms())
+        if remaining > 0:
+            await asyncio.sleep(remaining / 1000)
+        else:
+            if remaining < 0:
+                self.overruns += 1
+                missed = -remaining // self.period_ms
+                if missed:
+                    self.skipped += missed
+                    self.deadline = time.ticks_add(self.deadline, missed * self.period_ms)
+            await asyncio.sleep(0)
+        lateness = time.ticks_diff(time.ticks_ms(), self.deadline)
+        self.lateness_ms = lateness
+        if lateness > self.max_lateness_ms:
+            self.max_lateness_ms = lateness
+        self.deadline = time.ticks_add(self.deadline, self.period_ms)
+        self.runs += 1
+        self.metrics.start(lateness)
+
+    def get_stats(self) -> dict:
+        return {
+            "periodMs": self.period_ms,
+            "phaseMs": self.phase_ms,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "latenessMs": self.lateness_ms,
+            "maxLatenessMs": self.max_lateness_ms,
+        }
+
+
+@singleton
+class Scheduler:
+    """
+    Hands out PeriodicTasks that share one epoch, so that phase offsets between
+    loops (sensor sample, PID tick, status broadcast) hold.
+    """
+
+    def __init__(self):
+        self.epoch = time.ticks_ms()
+        self.tasks = {}
+
+    def every(self, name, period, phase=0) -> PeriodicTask:
+        """
+        Returns the deadline clock of a loop running every `period` seconds,
+        `phase` seconds after the epoch grid.
+        """
+        task = PeriodicTask(name, int(period * 1000), int(phase * 1000), self.epoch)
+        self.tasks[name] = task
+        return task
+
+    def get_stats(self) -> dict:
+        return {name: task.get_stats() for name, task in self.tasks.items()}
@@ -0,0 +1,140 @@
+import os
+import json
+import logging
+from collections import OrderedDict
+from microdot import Response
+
+MANIFEST_FILE = "assets.json"  # Written by tools/build_assets.py
+DEFAULT_CACHE_FILE_SIZE = 4 * 1024  # Files up to this size are kept in RAM once read
+DEFAULT_CACHE_SIZE = 32 * 1024  # Total bytes of the in-RAM cache
+
+log = logging.getLogger(__name__)
+
+
+class StaticFiles:
+    """
+    Serves the files under `root` with strong ETags (304 when the client copy is
+    current), gzip variants produced by tools/build_assets.py when the client
+    accepts them, and a small LRU of hot small files so repeated page loads do not
+    hit the flash.
+
+    The build step writes `assets.json` next to the files, mapping each path to its
+    content hash, size and whether a smaller `.gz` sibling exists. For files missing
+    from it, or whose size no longer matches (changed after the build), ETags are
+    derived from size and modification time and no gzip variant is used.
+    """
+
+    def __init__(self, root, max_age=None, cache_file_size=DEFAULT_CACHE_FILE_SIZE, cache_size=DEFAULT_CACHE_SIZE):
+        self.root = root
+        self.max_age = max_age
+        self.cache_file_size = cache_file_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # filename -> bytes, least recently used first
+        self._cached_bytes = 0
+        self._stats = {}  # path -> (etag, size, gzip size or None)
+        try:
+            with open(root + "/" + MANIFEST_FILE) as f:
+                self._manifest = json.load(f)
+        except (OSError, ValueError):
+            log.warning("No asset manifest in %s, run tools/build_assets.py", root)
+            self._manifest = {}
+
+    def _stat(self, path):
+        stat = self._stats.get(path)
+        if stat is None:
+            try:
+                s = os.stat(self.root + "/" + path)
+            except OSError:
+                return None
+            entry = self._manifest.get(path)
+            if entry and entry.get("size") != s[6]:
+                log.warning("%s changed since the asset manifest was built, run tools/build_assets.py", path)
+                entry = None
+            if entry:
+                stat = (entry["etag"], s[6], entry["gzip_size"] if entry.get("gzip") else None)
+            else:
+                stat = ('"%x-%x"' % (s[6], s[8]), s[6], None)
+            self._stats[path] = stat
+        return stat
+
+    def _read_cached(self, filename):
+        body = self._cache.pop(filename, None)
+        if body is None:
+            with open(filename, 'rb') as f:
+                body = f.read()
+            self._cached_bytes += len(body)
+            while self._cached_bytes > self.cache_size and self._cache:
+                oldest = next(iter(self._cache))
+                self._cached_bytes -= len(self._cache.pop(oldest))
+        self._cache[filename] = body  # Most recently used goes last
+        return body
+
+    def response(self, request, path):
+        stat = self._stat(path)
+        if stat is None:
+            return 'Not found', 404
+        etag, size, gzip_size = stat
+        filename = self.root + "/" + path
+        headers = {'Content-Type': _content_type(path)}
+        if gzip_size is not None:
+            headers['Vary'] = 'Accept-Encoding'
+            if _accepts_gzip(request.headers.get('Accept-Encoding', '')):
+                filename += ".gz"
+                size = gzip_size
+                # Strong ETags must differ between encodings
+                etag = etag[:-1] + '-gz"'
+                headers['Content-Encoding'] = 'gzip'
+        headers['ETag'] = etag
+        if self.max_age is not None:
+            headers['Cache-Control'] = 'max-age={}'.format(self.max_age)
+        if request.headers.get('If-None-Match') == etag:
+            del headers['Content-Type']
+            headers.pop('Content-Encoding', None)
+            # Length of the representation the client has, not of this empty body
+            headers['Content-Length'] = str(size)
+            return Response(status_code=304, headers=headers, reason='Not Modified')
+
+        if size <= self.cache_file_size:
+            body = self._read_cached(filename)
+            size = len(body)
+        else:
+            body = open(filename, 'rb')
+        headers['Content-Length'] = str(size)
+        return Response(body=body, headers=headers)
+
+
+def _accepts_gzip(accept_encoding):
+    """
+    Whether an Accept-Encoding header allows gzip, honouring q=0 ("not acceptable").
+    """
+    accepted = False
+    for coding in accept_encoding.split(','):
+        params = coding.split(';')
+        name = params[0].strip().lower()
+        if name not in ('gzip', '*'):
+            continue
+        q = 1.0
+        for param in params[1:]:
+            pair = param.split('=', 1)
+            if pair[0].strip().lower() == 'q' and len(pair) == 2:
+                try:
+                    q = float(pair[1])
+                except ValueError:
+                    q = 0.0
+        if name == 'gzip':
+            return q > 0  # An explicit gzip entry overrides the wildcard
+        accepted = q > 0
+    return accepted
+
+
+_FONT_TYPES = {
+    'eot': 'application/vnd.ms-fontobject',
+    'svg': 'image/svg+xml',
+    'ttf': 'font/ttf',
+    'woff': 'font/woff',
+}
+
+
+def _content_type(path):
+    ext = path.split('.')[-1]
+    return Response.types_map.get(ext) or _FONT_TYPES.get(ext, 'application/octet-stream')
@@ -0,0 +1,92 @@
+# Compact binary encoding of the oven status for /status?protocol=binary.
+#
+# The client first receives a JSON text frame describing the schema:
+#
+#     {"type": "schema", "version": 1, "fields": [...], "enums": {"state": ["IDLE", "RUNNING"]}}
+#
+# followed by binary frames laid out as:
+#
+#     byte 0      FRAME_KEY (every field present) or FRAME_DELTA (changed fields only)
+#     mask        ceil(len(fields) / 8) bytes, bit i (LSB first) set when fields[i] is present
+#     values      one little-endian float32 per present field, in schema order
+#
+# Enum fields carry the index of their value in the schema's list. Missing or
+# unknown values are sent as NaN. A delta frame applies to the values of the
+# previous frame, so the stream must not skip frames: a client that falls behind
+# is resynchronized with a key frame.
+import json
+import struct
+from array import array
+
+VERSION = 1
+FRAME_KEY = 0
+FRAME_DELTA = 1
+
+_NAN = float("nan")
+
+
+class StatusCodec:
+    def __init__(self, fields, enums=None):
+        self.fields = tuple(fields)
+        self.enums = enums or {}
+        self.mask_bytes = (len(self.fields) + 7) // 8
+        self.values = array('f', [_NAN] * len(self.fields))
+        self._mask = bytearray(self.mask_bytes)
+        self._full_mask = bytearray(self.mask_bytes)
+        for i in range(len(self.fields)):
+            self._full_mask[i >> 3] |= 1 << (i & 7)
+        # Worst case frame, reused as scratch space for every encode
+        self._scratch = bytearray(1 + self.mask_bytes + 4 * len(self.fields))
+        self._enum_index = [self.enums.get(name) for name in self.fields]
+
+    def schema(self) -> str:
+        return json.dumps({
+            "type": "schema",
+            "version": VERSION,
+            "fields": self.fields,
+            "enums": self.enums,
+        })
+
+    def _value(self, i, state):
+        value = state.get(self.fields[i])
+        enum = self._enum_index[i]
+        if enum is not None:
+            return enum.index(value) if value in enum else _NAN
+        if value is None or isinstance(value, str):
+            return _NAN
+        return value
+
+    def delta(self, state) -> bytes:
+        """
+        Stores state as the new reference and returns the frame with the fields that
+        changed since the previous call.
+        """
+        values = self.values
+        mask = self._mask
+        offset = 1 + self.mask_bytes
+        for b in range(self.mask_bytes):
+            mask[b] = 0
+        for i in range(len(self.fields)):
+            old = values[i]
+            values[i] = self._value(i, state)
+            new = values[i]  # Read back, so comparisons happen at float32 precision
+            if new != old and not (new != new and old != old):  # Unchanged NaN is not a change
+                mask[i >> 3] |= 1 << (i & 7)
+                struct.pack_into("<f", self._scratch, offset, new)
+                offset += 4
+        self._scratch[0] = FRAME_DELTA
+        self._scratch[1:1 + self.mask_bytes] = mask
+        return bytes(self._scratch[:offset])
+
+    def key(self) -> bytes:
+        """
+        Returns a frame with every field of the current reference state.
+        """
+        scratch = self._scratch
+        scratch[0] = FRAME_KEY
+        scratch[1:1 + self.mask_bytes] = self._full_mask
+        offset = 1 + self.mask_bytes
+        for value in self.values:
+            struct.pack_into("<f", scratch, offset, value)
+            offset += 4
+        return bytes(scratch)
@@ -0,0 +1,140 @@
+# NIST ITS-90 type K thermocouple conversions.
+# https://srdata.nist.gov/its90/type_k/kcoefficients.html
+# https://srdata.nist.gov/its90/type_k/kcoefficients_inverse.html
+#
+# Coefficients are stored highest order first so the polynomials can be evaluated
+# in Horner form without building any intermediate sequence.
+import math
+
+# Reference function (degC -> mV), 0 to 1372 degC
+_REFERENCE_POSITIVE = (
+    -0.121047212750e-25,
+    0.971511471520e-22,
+    -0.320207200030e-18,
+    0.560750590590e-15,
+    -0.560728448890e-12,
+    0.318409457190e-09,
+    -0.994575928740e-07,
+    0.185587700320e-04,
+    0.389212049750e-01,
+    -0.176004136860e-01,
+)
+_REFERENCE_A0 = 0.1185976
+_REFERENCE_A1 = -0.1183432e-03
+_REFERENCE_A2 = 0.1269686e03
+
+# Reference function (degC -> mV), -270 to 0 degC
+_REFERENCE_NEGATIVE = (
+    -0.163226974860e-22,
+    -0.198892668780e-19,
+    -0.104516093650e-16,
+    -0.310888728940e-14,
+    -0.574103274280e-12,
+    -0.675090591730e-10,
+    -0.499048287770e-08,
+    -0.328589067840e-06,
+    0.236223735980e-04,
+    0.394501280250e-01,
+    0.0,
+)
+
+# Inverse functions (mV -> degC) and the voltage range each one covers
+_INVERSE_NEGATIVE = (
+    -5.1920577e-04,
+    -1.0450598e-02,
+    -8.6632643e-02,
+    -3.7342377e-01,
+    -8.9773540e-01,
+    -1.0833638e00,
+    -1.1662878e00,
+    2.5173462e01,
+    0.0000000e00,
+)
+_INVERSE_LOW = (
+    -1.052755e-08,
+    1.057734e-06,
+    -4.413030e-05,
+    9.804036e-04,
+    -1.228034e-02,
+    8.315270e-02,
+    -2.503131e-01,
+    7.860106e-02,
+    2.508355e01,
+    0.000000e00,
+)
+_INVERSE_HIGH = (
+    -3.110810e-08,
+    8.802193e-06,
+    -9.650715e-04,
+    5.464731e-02,
+    -1.646031e00,
+    4.830222e01,
+    -1.318058e02,
+)
+MIN_VOLTAGE = -5.891
+LOW_VOLTAGE_LIMIT = 20.644
+MAX_VOLTAGE = 54.886
+
+# MAX31855 output slope for type K (datasheet table 1), in mV/degC
+MAX31855_SENSITIVITY = 0.041276
+
+
+def horner(coefficients, x):
+    """
+    Evaluates the polynomial with the given coefficients (highest order first) at x.
+    """
+    result = 0.0
+    for c in coefficients:
+        result = result * x + c
+    return result
+
+
+def cold_junction_voltage(temperature):
+    """
+    Thermoelectric voltage (mV) of a type K junction at the given temperature (degC).
+    """
+    if temperature >= 0:
+        d = temperature - _REFERENCE_A2
+        return horner(_REFERENCE_POSITIVE, temperature) + _REFERENCE_A0 * math.exp(_REFERENCE_A1 * d * d)
+    return horner(_REFERENCE_NEGATIVE, temperature)
+
+
+def voltage_to_temperature(voltage):
+    """
+    Temperature (degC) for a type K thermoelectric voltage (mV), or None when the
+    voltage is outside the -5.891 mV to 54.886 mV range of the inverse functions.
+    """
+    if MIN_VOLTAGE <= voltage <= 0:
+        return horner(_INVERSE_NEGATIVE, voltage)
+    elif 0 < voltage <= LOW_VOLTAGE_LIMIT:
+        return horner(_INVERSE_LOW, voltage)
+    elif LOW_VOLTAGE_LIMIT < voltage <= MAX_VOLTAGE:
+        return horner(_INVERSE_HIGH, voltage)
+    return None
+
+
+class ColdJunctionTable:
+    """
+    Precomputed cold_junction_voltage over the board temperature range, read back with
+    linear interpolation. The cold junction is the MAX31855 die, which changes slowly
+    and only within a few tens of degrees, so the table replaces the polynomial and
+    exp() with a couple of multiplications. Temperatures outside the table fall back
+    to the exact computation.
+    """
+
+    def __init__(self, low=-40.0, high=125.0, step=0.5):
+        self.low = low
+        self.high = high
+        self.step = step
+        self.inverse_step = 1 / step
+        count = int((high - low) / step) + 1
+        self.voltages = [cold_junction_voltage(low + i * step) for i in range(count)]
+        self.last = count - 1
+
+    def voltage(self, temperature):
+        position = (temperature - self.low) * self.inverse_step
+        i = int(position)
+        if position < 0 or i >= self.last:
+            return cold_junction_voltage(temperature)
+        v0 = self.voltages[i]
+        return v0 + (self.voltages[i + 1] - v0) * (position - i)
@@ -0,0 +1,168 @@
+import json
+import logging
+import config
+from microdot import Microdot, redirect
+from microdot.websocket import with_websocket, WebSocketError
+from oven import Profile
+from pid_config import pid_config
+from scheduler import Scheduler
+
+log = logging.getLogger("picoreflowd")
+
+
+def create_app(oven, ovenWatcher, influxDB, profile_index, static_files, instrumentation, boot):
+    """
+    Builds the Microdot app serving the UI, the websockets and /metrics. Kept out of
+    main.py so that the web stack is only imported once the control loop is running.
+    """
+    app = Microdot()
+
+    @app.route('/')
+    async def index(request):
+        # return 'Hello, world!'
+        return redirect('/picoreflow/index.html')
+
+    @app.route('/health')
+    async def index(request):
+        return 'OK'
+
+    @app.route('/metrics')
+    async def metrics(request):
+        # Loop lateness/execution histograms, scheduler counters and GC timings
+        metrics = instrumentation.get_metrics()
+        metrics["scheduler"] = Scheduler().get_stats()
+        metrics["influxdb"] = influxDB.get_stats()
+        if boot.enabled:
+            metrics["boot"] = boot.get_stats()
+        return metrics
+
+    @app.route('/parameters', methods=['GET', 'POST'])
+    async def parameters(request):
+        if request.method == "GET":
+            return json.dumps(pid_config.get_pid_config())
+        elif request.method == "POST":
+            data = request.json
+            log.info("Received parameters: %s", data) # Received parameters: {'coefficient': 'kp', 'value': '32'}
+            pid_config.set_config(name=data.get('coefficient'), value=float(data.get('value')))
+            return json.dumps({"status": "success", "message": "Parameters updated"})
+
+
+    @app.route('/status')
+    @with_websocket
+    async def status(request, ws):
+        log.info("websocket (status) opened")
+        # /status?protocol=binary opts in to the compact delta encoded stream (see status_codec.py)
+        await ovenWatcher.add_observer(ws, binary=request.args.get('protocol') == 'binary')
+        while True:
+            try:
+                message = await ws.receive()
+                await ws.send("Your message was: %r" % message)
+            except WebSocketError:
+                break
+        ovenWatcher.remove_observer(ws)
+        log.info("websocket (status) closed")
+
+    @app.route('/picoreflow/<path:path>')
+    async def public(request, path):
+        if '..' in path:
+            # directory traversal is not allowed
+            return 'Not found', 404
+        return static_files.response(request, path)
+
+    @app.route('/control')
+    @with_websocket
+    async def control(request, ws):
+        log.info("websocket (control) opened")
+        while True:
+            try:
+                message = await ws.receive()
+                log.info("Received (control): %s", message)
+                msgdict = json.loads(message)
+                if msgdict.get("cmd") == "RUN":
+                    log.info("RUN command received")
+                    profile_obj = msgdict.get('profile')
+                    if profile_obj:
+                        profile_json = json.dumps(profile_obj)
+                        profile = Profile(profile_json)
+                    expected_observations = profile.get_duration() / oven.time_step
+                    backlog_undersampling_factor = int(expected_observations/100)+1
+                    log.debug("Expected observations: %s", expected_observations)
+                    log.debug("Backlog undersampling factor: %s", backlog_undersampling_factor)
+                    log.debug("Expected to observe every %s seconds", oven.time_step * backlog_undersampling_factor)
+                    oven.run_profile(profile, backlog_undersampling_factor)
+                    ovenWatcher.record(profile)
+                elif msgdict.get("cmd") == "STOP":
+                    log.info("Stop command received")
+                    oven.abort_run()
+            except WebSocketError:
+                break
+        log.info("websocket (control) closed")
+
+
+    @app.route('/storage')
+    @with_websocket
+    async def handle_storage(request, ws):
+        log.info("websocket (storage) opened")
+        while True:
+            try:
+                message = await ws.receive()
+                if not message:
+                    break
+                log.debug("websocket (storage) received: %s", message)
+
+                try:
+                    msgdict = json.loads(message)
+                except:
+                    msgdict = {}
+
+                if message == "GET":
+                    log.info("GET command recived")
+                    await ws.send(profile_index.list_json())
+                elif msgdict.get("cmd") == "DELETE":
+                    log.info("DELETE command received")
+                    profile_obj = msgdict.get('profile')
+                    if profile_index.delete(profile_obj):
+                      msgdict["resp"] = "OK"
+                    await ws.send(json.dumps(msgdict))
+                    #wsock.send(profile_index.list_json())
+                elif msgdict.get("cmd") == "PUT":
+                    log.info("PUT command received")
+                    profile_obj = msgdict.get('profile')
+                    force = msgdict.get('force', False)
+                    if profile_obj:
+                        #del msgdict["cmd"]
+                        if profile_index.save(profile_obj, force):
+                            msgdict["resp"] = "OK"
+                        else:
+                            msgdict["resp"] = "FAIL"
+                        log.debug("websocket (storage) sent: %s", message)
+
+                        await ws.send(json.dumps(msgdict))
+                        await ws.send(profile_index.list_json())
+            except WebSocketError:
+                break
+        log.info("websocket (storage) closed")
+
+    @app.route('/config')
+    @with_websocket
+    async def handle_config(request, ws):
+        log.info("websocket (config) opened")
+        while True:
+            try:
+                message = await ws.receive()
+                print("Received message (config):", message)
+                await ws.send(get_config())
+            except WebSocketError:
+                break
+        log.info("websocket (config) closed")
+
+    return app
+
+
+def get_config():
+    print("Getting config")
+    return json.dumps({"temp_scale": config.temp_scale,
+        "time_scale_slope": config.time_scale_slope,
+        "time_scale_profile": config.time_scale_profile,
+        "kwh_rate": config.kwh_rate,
+        "currency_type": config.currency_type})
@@ -1,3 +1,4 @@
+import asyncio
 import network
 from time import sleep_ms
 import machine
@@ -32,13 +33,13 @@ def disconnect_wifi():
 	sta.disconnect()
 	sleep_ms(1000)
 
-def connect_to_wifi() -> bool:
+def _start_connecting():
 	initing()
 	sta = network.WLAN(network.STA_IF)
 	sta.active(True)
 
 	if sta.isconnected():
-		return True
+		return sta
 
 	wifi_list = sta.scan()
 
@@ -51,18 +52,15 @@ def connect_to_wifi() -> bool:
 
 	sta.connect(ssid, password)
 	connecting()
+	return sta
 
-	while (not sta.isconnected()):
-		status = sta.status()
-
-		if status in [network.STAT_IDLE, network.STAT_GOT_IP, network.STAT_NO_AP_FOUND, network.STAT_WRONG_PASSWORD]:
-			break
-		elif status == network.STAT_CONNECTING:
-			pass
-
-		sleep_ms(200)
+def _still_connecting(sta) -> bool:
+	if sta.isconnected():
+		return False
+	status = sta.status()
+	return status not in [network.STAT_IDLE, network.STAT_GOT_IP, network.STAT_NO_AP_FOUND, network.STAT_WRONG_PASSWORD]
 
-	sleep_ms(1000)
+def _finish_connecting(sta) -> bool:
 	status = sta.status()
 
 	if status == network.STAT_GOT_IP:
@@ -76,3 +74,29 @@ def connect_to_wifi() -> bool:
 		failed()
 		print(f'Connect wifi failed with status code: {status}')
 		return False
+
+def connect_to_wifi() -> bool:
+	sta = _start_connecting()
+	if sta.isconnected():
+		return True
+
+	while _still_connecting(sta):
+		sleep_ms(200)
+
+	sleep_ms(1000)
+	return _finish_connecting(sta)
+
+async def connect_to_wifi_async() -> bool:
+	"""
+	Same as connect_to_wifi, but lets other tasks (sensor, PID) run while waiting
+	for the access point. The scan itself still blocks.
+	"""
+	sta = _start_connecting()
+	if sta.isconnected():
+		return True
+
+	while _still_connecting(sta):
+		await asyncio.sleep_ms(200)
+
+	await asyncio.sleep_ms(1000)
+	return _finish_connecting(sta)
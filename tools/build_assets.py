@@ -0,0 +1,59 @@
+"""Prepares microdot_controller/public for serving by static_files.StaticFiles.
+
+For every asset it computes a content hash used as a strong ETag and writes a
+gzip-compressed ``.gz`` sibling when that is smaller than the original. The
+result is recorded in ``public/assets.json``. Run it on the host before copying
+or mounting the controller files:
+
+    python tools/build_assets.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(__file__), "..", "microdot_controller", "public")
+MANIFEST_FILE = "assets.json"
+MIN_SAVING = 0.1  # Keep a .gz only if it is at least 10% smaller
+
+
+def build(root):
+    manifest = {}
+    saved = 0
+    for directory, _dirs, files in os.walk(root):
+        for name in sorted(files):
+            if name.endswith(".gz") or name == MANIFEST_FILE:
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                data = f.read()
+            # The size lets the controller notice files changed after the build
+            entry = {"etag": '"%s"' % hashlib.sha1(data).hexdigest()[:16], "size": len(data), "gzip": False}
+            # mtime=0 keeps the output reproducible
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                with open(path + ".gz", "wb") as f:
+                    f.write(compressed)
+                entry["gzip"] = True
+                entry["gzip_size"] = len(compressed)
+                saved += len(data) - len(compressed)
+            elif os.path.exists(path + ".gz"):
+                os.remove(path + ".gz")
+            manifest[relative] = entry
+            print("%-60s %8d %8s" % (relative, len(data), entry.get("gzip_size", "-")))
+    with open(os.path.join(root, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    print("%d assets, %d bytes saved by gzip" % (len(manifest), saved))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", nargs="?", default=DEFAULT_ROOT, help="directory holding the web assets")
+    args = parser.parse_args()
+    build(args.root)
+
+
+if __name__ == "__main__":
+    main()
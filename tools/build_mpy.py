@@ -0,0 +1,80 @@
+"""Precompiles microdot_controller to .mpy bytecode for deployment.
+
+Every module is compiled on the host with mpy-cross, so the board loads
+bytecode instead of compiling the sources at each boot. The result is a copy
+of the controller directory under build/ that can be mounted or copied like
+the sources:
+
+    pip install "mpy-cross==1.25.*"   # must match the firmware version
+    python tools/build_mpy.py
+    cd build/microdot_controller && mpr -d c9 -m . exec "import main"
+
+main.py stays as source because MicroPython only runs main.py (not main.mpy)
+at boot; it is small and imports everything else as bytecode. boot.py and the
+config files stay as sources too so they can still be edited on the board. The
+web assets, profiles and other data files are copied as they are.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DEFAULT_SOURCE = os.path.join(ROOT, "microdot_controller")
+DEFAULT_OUTPUT = os.path.join(ROOT, "build", "microdot_controller")
+KEEP_AS_SOURCE = {"boot.py", "main.py", "config.py", "config_mini_kiln.py"}
+SKIP_DIRS = {"__pycache__", "benchmarks"}
+SKIP_FILES = {"test.py", "run.bat"}
+
+
+def mpy_cross_command(executable):
+    if executable:
+        return [executable]
+    if shutil.which("mpy-cross"):
+        return ["mpy-cross"]
+    try:
+        import mpy_cross  # noqa: F401  (pip install mpy-cross)
+    except ImportError:
+        sys.exit("mpy-cross not found: pip install mpy-cross, or pass --mpy-cross")
+    return [sys.executable, "-m", "mpy_cross"]
+
+
+def build(source, output, command, optimize):
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    py_size = mpy_size = 0
+    for directory, dirs, files in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        relative_dir = os.path.relpath(directory, source)
+        os.makedirs(os.path.join(output, relative_dir), exist_ok=True)
+        for name in sorted(files):
+            if name in SKIP_FILES or name.endswith((".pyc", ".mpy")):
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.normpath(os.path.join(relative_dir, name)).replace(os.sep, "/")
+            if not name.endswith(".py") or (relative_dir == "." and name in KEEP_AS_SOURCE):
+                shutil.copy2(path, os.path.join(output, relative))
+                continue
+            target = os.path.join(output, relative[:-3] + ".mpy")
+            # -s keeps the source path in tracebacks
+            subprocess.run(command + ["-O%d" % optimize, "-s", relative, "-o", target, path], check=True)
+            py_size += os.path.getsize(path)
+            mpy_size += os.path.getsize(target)
+            print("%-50s %8d %8d" % (relative, os.path.getsize(path), os.path.getsize(target)))
+    print("%d bytes of sources compiled to %d bytes of bytecode in %s" % (py_size, mpy_size, output))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="controller directory")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where the compiled tree is written")
+    parser.add_argument("--mpy-cross", help="path to the mpy-cross executable")
+    parser.add_argument("-O", dest="optimize", type=int, default=0,
+                        help="mpy-cross optimisation level (1 and up drop asserts and __debug__ code)")
+    args = parser.parse_args()
+    build(args.source, args.output, mpy_cross_command(args.mpy_cross), args.optimize)
+
+
+if __name__ == "__main__":
+    main()
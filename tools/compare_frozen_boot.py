@@ -0,0 +1,76 @@
+"""Compares controller boot cost from sources, precompiled .mpy and frozen bytecode.
+
+Runs microdot_controller/benchmarks/boot_unix.py under MicroPython unix port
+binaries and reports the median import time, process wall time and free heap
+of each setup:
+
+    source   stock micropython, modules compiled from microdot_controller/*.py
+    mpy      stock micropython, modules loaded from tools/build_mpy.py output
+    frozen   micropython built with firmware/manifest_unix.py, no files on the path
+
+    python tools/compare_frozen_boot.py --micropython ~/micropython/ports/unix/build-standard/micropython \\
+        --frozen ~/micropython/ports/unix/build-frozen/micropython-frozen
+
+The heap size is fixed (-X heapsize) so that free heap is comparable between
+runs; the default is close to what the ESP32-S2 leaves to the controller.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CONTROLLER = os.path.join(ROOT, "microdot_controller")
+MPY_BUILD = os.path.join(ROOT, "build", "microdot_controller")
+BOOT_SCRIPT = os.path.join(CONTROLLER, "benchmarks", "boot_unix.py")
+
+
+def run(binary, path, heapsize, runs):
+    # The script is copied out of the controller tree so that its directory,
+    # which MicroPython puts first on sys.path, does not shadow anything.
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "boot_unix.py")
+        with open(BOOT_SCRIPT) as source, open(script, "w") as target:
+            target.write(source.read())
+        env = dict(os.environ, MICROPYPATH=":".join([".frozen"] + path))
+        results = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [binary, "-X", "heapsize=" + heapsize, script],
+                env=env, cwd=directory, check=True, capture_output=True, text=True,
+            ).stdout
+            wall_ms = (time.perf_counter() - start) * 1000
+            result = json.loads(output.strip().splitlines()[-1])
+            result["wall_ms"] = wall_ms
+            results.append(result)
+    return {key: statistics.median(r[key] for r in results) for key in results[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--micropython", required=True, help="stock unix port binary")
+    parser.add_argument("--frozen", help="unix port binary built with firmware/manifest_unix.py")
+    parser.add_argument("--heapsize", default="256k")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    setups = [("source", args.micropython, [CONTROLLER])]
+    if os.path.isdir(MPY_BUILD):
+        setups.append(("mpy", args.micropython, [MPY_BUILD]))
+    else:
+        print("no %s, run tools/build_mpy.py to include the .mpy setup" % MPY_BUILD)
+    if args.frozen:
+        setups.append(("frozen", args.frozen, []))
+
+    print("%-8s %10s %10s %10s %10s" % ("setup", "import ms", "wall ms", "mem_free", "mem_alloc"))
+    for name, binary, path in setups:
+        r = run(binary, path, args.heapsize, args.runs)
+        print("%-8s %10.1f %10.1f %10d %10d" % (name, r["import_ms"], r["wall_ms"], r["mem_free"], r["mem_alloc"]))
+
+
+if __name__ == "__main__":
+    main()